@@ -12,11 +12,13 @@ from config import SENTRY_DSN, REDIS_URL
 from database import init_db_pool, run_migrations
 from services.scheduler import init_firebase, start_scheduler
 from services.ai_service import get_client
+from services.teams import start_team_directory
 
 from routes.chat          import chat_bp
 from routes.user          import user_bp
 from routes.media         import media_bp
 from routes.notifications import notifications_bp
+from routes.admin         import admin_bp
 from routes.websocket     import register_websocket
 
 # ── Sentry ────────────────────────────────────────────────────────────────────
@@ -61,6 +63,7 @@ app.register_blueprint(chat_bp)
 app.register_blueprint(user_bp)
 app.register_blueprint(media_bp)
 app.register_blueprint(notifications_bp)
+app.register_blueprint(admin_bp)
 register_websocket(sock)
 
 # ── Learning system ───────────────────────────────────────────────────────────
@@ -125,6 +128,11 @@ try:
 except Exception as e:
     print(f"⚠️ OpenAI client başlatılamadı: {e}")
 
+try:
+    start_team_directory()
+except Exception as e:
+    print(f"⚠️ Team directory başlatılamadı: {e}")
+
 init_firebase()
 start_scheduler()
 
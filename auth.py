@@ -1,14 +1,132 @@
 # auth.py
+import time
+import threading
 import traceback as tb
 from functools import wraps
 from urllib.parse import unquote
 from flask import request, jsonify
 import sentry_sdk
-from config import ADMIN_GOOGLE_IDS, SENTRY_DSN
+from config import (
+    ADMIN_GOOGLE_IDS, SENTRY_DSN,
+    AUTH_CACHE_TTL, AUTH_CACHE_MAX_ENTRIES, LAST_LOGIN_THROTTLE,
+)
 from database import get_db, release_db
+from services.cache import get_redis
+
+
+# ── Kimlik cache ──────────────────────────────────────────────────────────────
+# (device_id, google_id) → user. Tier/silme değişikliklerinde
+# invalidate_user_cache çağrılır. Redis varsa invalidation zamanı
+# dostai:auth:invalidated:{user_id} anahtarına yazılır ve her cache hit'inde
+# kontrol edilir — tüm worker'lar hemen görür. Redis yoksa hit'lerde
+# deleted_at / subscription_tier DB'den tekrar doğrulanır.
+
+INVALIDATION_KEY_PREFIX = 'dostai:auth:invalidated:'
+
+_identity_cache = {}   # key -> (expires_at, user, filled_at)
+_last_login     = {}   # user_id -> son last_login_at güncellemesi (monotonic)
+_cache_lock     = threading.Lock()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        entry = _identity_cache.get(key)
+        if not entry:
+            return None
+        if entry[0] < time.monotonic():
+            _identity_cache.pop(key, None)
+            return None
+        user, filled_at = dict(entry[1]), entry[2]
+
+    if _still_valid(user, filled_at):
+        return user
+    with _cache_lock:
+        if _identity_cache.get(key) is entry:
+            _identity_cache.pop(key, None)
+    return None
+
+
+def _cache_put(key, user, filled_at):
+    """filled_at: DB okumasından ÖNCE alınan zaman — okuma sırasında gelen invalidation kaçmasın."""
+    now = time.monotonic()
+    with _cache_lock:
+        if len(_identity_cache) >= AUTH_CACHE_MAX_ENTRIES:
+            for k in [k for k, (exp, _, _) in _identity_cache.items() if exp < now]:
+                _identity_cache.pop(k, None)
+            if len(_identity_cache) >= AUTH_CACHE_MAX_ENTRIES:
+                _identity_cache.clear()
+        _identity_cache[key] = (now + AUTH_CACHE_TTL, dict(user), filled_at)
+
+
+def _still_valid(user, filled_at):
+    r = get_redis()
+    if r is not None:
+        try:
+            raw = r.get(f"{INVALIDATION_KEY_PREFIX}{user['id']}")
+            return not raw or float(raw) < filled_at
+        except Exception:
+            pass
+
+    conn = None
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT subscription_tier, deleted_at FROM users WHERE id = %s", (user['id'],)
+        )
+        row = cursor.fetchone()
+        cursor.close()
+        return bool(row) and row['deleted_at'] is None \
+            and row['subscription_tier'] == user.get('subscription_tier')
+    except Exception:
+        return False
+    finally:
+        release_db(conn)
+
+
+def invalidate_user_cache(user_id):
+    """Tier, isim veya silme durumu değiştiğinde çağrılır — tüm worker'lara yayılır."""
+    with _cache_lock:
+        for k in [k for k, (_, u, _) in _identity_cache.items() if str(u['id']) == str(user_id)]:
+            _identity_cache.pop(k, None)
+
+    r = get_redis()
+    if r is not None:
+        try:
+            # Bundan eski cache kayıtları en fazla AUTH_CACHE_TTL yaşar; anahtar o kadar yeter
+            r.set(f"{INVALIDATION_KEY_PREFIX}{user_id}", time.time(), ex=int(AUTH_CACHE_TTL) + 60)
+        except Exception as e:
+            print(f"⚠️ Auth cache invalidation error: {e}", flush=True)
+
+
+def _touch_last_login(user_id):
+    """last_login_at'i en fazla LAST_LOGIN_THROTTLE'da bir, toplu olarak günceller."""
+    from services.writer import enqueue_login
+    now = time.monotonic()
+    with _cache_lock:
+        last = _last_login.get(user_id)
+        if last is not None and now - last < LAST_LOGIN_THROTTLE:
+            return
+        if len(_last_login) >= AUTH_CACHE_MAX_ENTRIES:
+            for uid in [u for u, t in _last_login.items() if now - t >= LAST_LOGIN_THROTTLE]:
+                _last_login.pop(uid, None)
+        _last_login[user_id] = now
+    enqueue_login(user_id)
+
+
+def _mark_logged_in(user_id):
+    with _cache_lock:
+        _last_login[user_id] = time.monotonic()
 
 
 def get_or_create_user(device_id, name=None, google_id=None, email=None):
+    key       = (device_id, google_id)
+    filled_at = time.time()
+    cached    = _cache_get(key)
+    if cached and (not email or cached.get('email') == email):
+        _touch_last_login(cached['id'])
+        return cached
+
     conn = None
     try:
         conn = get_db()
@@ -20,13 +138,19 @@ def get_or_create_user(device_id, name=None, google_id=None, email=None):
             )
             user = cursor.fetchone()
             if user:
-                cursor.execute(
-                    "UPDATE users SET last_login_at = NOW(), device_id = %s, email = %s WHERE id = %s",
-                    (device_id, email, user['id'])
-                )
-                conn.commit()
+                if user.get('device_id') != device_id or user.get('email') != email:
+                    cursor.execute(
+                        "UPDATE users SET last_login_at = NOW(), device_id = %s, email = %s WHERE id = %s",
+                        (device_id, email, user['id'])
+                    )
+                    conn.commit()
+                    _mark_logged_in(user['id'])
+                else:
+                    _touch_last_login(user['id'])
                 cursor.close()
-                return dict(user)
+                user = dict(user)
+                _cache_put(key, user, filled_at)
+                return user
 
         cursor.execute(
             "SELECT * FROM users WHERE device_id = %s AND deleted_at IS NULL", (device_id,)
@@ -38,14 +162,21 @@ def get_or_create_user(device_id, name=None, google_id=None, email=None):
                     "UPDATE users SET last_login_at = NOW(), google_id = %s, email = %s WHERE id = %s",
                     (google_id, email, user['id'])
                 )
-            else:
+                conn.commit()
+                _mark_logged_in(user['id'])
+            elif email and email != user.get('email'):
                 cursor.execute(
-                    "UPDATE users SET last_login_at = NOW(), email = COALESCE(%s, email) WHERE id = %s",
+                    "UPDATE users SET last_login_at = NOW(), email = %s WHERE id = %s",
                     (email, user['id'])
                 )
-            conn.commit()
+                conn.commit()
+                _mark_logged_in(user['id'])
+            else:
+                _touch_last_login(user['id'])
             cursor.close()
-            return dict(user)
+            user = dict(user)
+            _cache_put(key, user, filled_at)
+            return user
 
         user_name = name or "Arkadaşım"
         cursor.execute("""
@@ -58,7 +189,9 @@ def get_or_create_user(device_id, name=None, google_id=None, email=None):
         conn.commit()
         cursor.close()
         print(f"✅ Yeni kullanıcı: {device_id} | google: {google_id}")
-        return dict(new_user)
+        new_user = dict(new_user)
+        _cache_put(key, new_user, filled_at)
+        return new_user
 
     except Exception as e:
         if conn:
@@ -0,0 +1,98 @@
+# benchmarks/bench_matcher.py
+"""
+Router mesaj sınıflandırma mikro-benchmark'ı.
+
+Eski yol (her grup için ayrı `any(t in msg ...)` taramaları + QUESTION_PATTERNS
+döngüsü + coin için re.findall) ile tek geçişli scan_message'ı aynı mesajlar
+üzerinde karşılaştırır ve sonuçların birebir aynı olduğunu doğrular.
+
+    python -m benchmarks.bench_matcher [tekrar_sayısı]
+"""
+import re
+import sys
+import time
+
+from services.router import (
+    SPORT_TRIGGERS, RECENCY_TRIGGERS, WEB_SEARCH_TRIGGERS, INFO_TRIGGERS,
+    WEATHER_TRIGGERS, TR_CITIES, FINANCE_TRIGGERS, CRYPTO_TRIGGERS,
+    ALL_TEAM_KEYWORDS, KNOWN_COINS, QUESTION_PATTERNS, scan_message,
+)
+
+MESSAGES = [
+    "selam nasılsın",
+    "bugün istanbul'da hava nasıl, mont giysem mi?",
+    "fenerbahçe galatasaray maçı dün kaç kaç bitti",
+    "dolar kaç tl oldu, bitcoin ve eth ne durumda",
+    "akşam ne izleyeyim bana bir film önerir misin",
+    "einstein kimdir ve görelilik teorisi hakkında bilgi verir misin",
+    "bu hafta trabzonspor'un maçı var mı",
+    "işten yeni geldim çok yorgunum, biraz sohbet edelim mi",
+    "solana ada ve xrp fiyatları ne kadar, borsa bugün düştü mü",
+    "ankara'da yarın yağmur yağacak mı",
+]
+
+
+def legacy_scan(msg_lower):
+    """Değişiklik öncesi router'daki taramalarla aynı sonuçlar."""
+    coins = []
+    for word in re.findall(r'[a-zA-Z0-9]+', msg_lower):
+        if word in KNOWN_COINS and word not in coins:
+            coins.append(word)
+    return {
+        'sport':      any(t in msg_lower for t in SPORT_TRIGGERS),
+        'recency':    any(t in msg_lower for t in RECENCY_TRIGGERS),
+        'web_search': any(t in msg_lower for t in WEB_SEARCH_TRIGGERS),
+        'info':       any(t in msg_lower for t in INFO_TRIGGERS),
+        'weather':    any(t in msg_lower for t in WEATHER_TRIGGERS),
+        'finance':    any(t in msg_lower for t in FINANCE_TRIGGERS),
+        'crypto':     any(t in msg_lower for t in CRYPTO_TRIGGERS),
+        'teams':      [t for t in ALL_TEAM_KEYWORDS if t in msg_lower],
+        'city':       next((c for c in TR_CITIES if c in msg_lower), None),
+        'coins':      coins,
+        'question':   any(re.search(p, msg_lower) for p in QUESTION_PATTERNS),
+    }
+
+
+def new_scan(msg_lower):
+    signals = scan_message(msg_lower)
+    return {
+        'sport':      signals.has('sport'),
+        'recency':    signals.has('recency'),
+        'web_search': signals.has('web_search'),
+        'info':       signals.has('info'),
+        'weather':    signals.has('weather'),
+        'finance':    signals.has('finance'),
+        'crypto':     signals.has('crypto'),
+        'teams':      list(signals.terms('team')),
+        'city':       next(iter(signals.terms('city')), None),
+        'coins':      list(dict.fromkeys(signals.terms('coin'))),
+        'question':   signals.question,
+    }
+
+
+def bench(fn, messages, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for msg in messages:
+            fn(msg)
+    return (time.perf_counter() - started) / (rounds * len(messages)) * 1e6
+
+
+def main():
+    rounds   = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    messages = [m.lower() for m in MESSAGES]
+
+    for msg in messages:
+        old, new = legacy_scan(msg), new_scan(msg)
+        if old != new:
+            raise SystemExit(f"Sonuç farkı: {msg!r}\n  eski: {old}\n  yeni: {new}")
+
+    old_us = bench(legacy_scan, messages, rounds)
+    new_us = bench(new_scan, messages, rounds)
+    print(f"eski (any + regex döngüsü): {old_us:8.1f} µs/mesaj")
+    print(f"yeni (scan_message):        {new_us:8.1f} µs/mesaj")
+    print(f"hızlanma:                   {old_us / new_us:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,7 @@ from flask import Blueprint, request, jsonify
 import openai
 import os
 from learning_engine import LearningEngine
+from services.learning import merge_analysis
 from context_tracker import ContextTracker
 import psycopg2
 
@@ -29,42 +30,8 @@ def save_user_facts(device_id: str, analysis: dict):
         conn = get_db_connection()
         cur = conn.cursor()
         
-        # Save interests
-        for interest in analysis.get('interests', []):
-            cur.execute("""
-                INSERT INTO user_facts (device_id, category, fact_key, confidence, source)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (device_id, category, fact_key)
-                DO UPDATE SET 
-                    confidence = (user_facts.confidence + EXCLUDED.confidence) / 2,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (device_id, interest['category'], interest['fact_key'], 
-                  interest['confidence'], interest['source']))
-        
-        # Save location
-        if analysis.get('location'):
-            loc = analysis['location']
-            cur.execute("""
-                INSERT INTO user_facts (device_id, category, fact_key, confidence, source)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (device_id, category, fact_key)
-                DO UPDATE SET 
-                    confidence = EXCLUDED.confidence,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (device_id, loc['category'], loc['fact_key'], 
-                  loc['confidence'], loc['source']))
-        
-        # Save personality traits
-        for trait in analysis.get('personality', []):
-            cur.execute("""
-                INSERT INTO personality_traits (device_id, trait, score, evidence_count)
-                VALUES (%s, %s, %s, %s)
-                ON CONFLICT (device_id, trait)
-                DO UPDATE SET 
-                    score = (personality_traits.score + EXCLUDED.score) / 2,
-                    evidence_count = personality_traits.evidence_count + 1,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (device_id, trait['trait'], trait['score'], trait['evidence_count']))
+        # Interests, location and traits in a handful of multi-row upserts
+        merge_analysis(cur, device_id, analysis)
         
         conn.commit()
         cur.close()
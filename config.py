@@ -20,11 +20,133 @@ MODEL_STT        = "whisper-1"
 MODEL_IMAGE      = "gpt-4o"
 MODEL_IMAGE_GEN  = "dall-e-3"
 
+# AI gateway — tüm OpenAI çağrılarının paylaştığı httpx havuzu
+AI_MAX_CONNECTIONS      = 64
+AI_MAX_KEEPALIVE        = 32
+AI_KEEPALIVE_EXPIRY     = 60.0   # sn
+AI_HTTP2                = True   # h2 paketi yoksa HTTP/1.1'e düşer
+AI_QUEUE_TIMEOUT        = 30.0   # Model kapasitesi doluysa en fazla bu kadar beklenir (sn)
+AI_DEFAULT_CONCURRENCY  = 16
+AI_MODEL_CONCURRENCY = {
+    'gpt-4o':      16,
+    'gpt-4o-mini': 32,
+    'tts-1':        8,
+    'whisper-1':    8,
+    'dall-e-3':     4,
+}
+AI_CALL_TIMEOUTS = {   # Çağrı tipine göre upstream timeout (sn)
+    'default':      60.0,
+    'chat':         60.0,
+    'chat_stream':  90.0,
+    'extraction':   30.0,
+    'notification': 30.0,
+    'tts':          30.0,
+    'stt':          60.0,
+    'vision':       60.0,
+    'image':        90.0,
+}
+
 # ── Database ──────────────────────────────────────────────────────────────────
 DATABASE_URL = os.getenv('DATABASE_URL')
 DB_MIN_CONN  = 2
 DB_MAX_CONN  = 20
 
+# ── Fact extraction kuyruğu ───────────────────────────────────────────────────
+EXTRACTION_WORKERS          = 3      # Aynı anda en fazla bu kadar extraction (DB + OpenAI)
+EXTRACTION_QUEUE_SIZE       = 500    # Bekleyen kullanıcı sayısı üst sınırı — dolunca en eskisi atılır
+EXTRACTION_MAX_COALESCED    = 5      # Kullanıcı başına birleştirilen en fazla bekleyen mesaj
+EXTRACTION_BATCH_SIZE       = 8      # Tek GPT isteğinde analiz edilen en fazla kullanıcı
+EXTRACTION_BATCH_WAIT_MS    = 300    # Batch dolsun diye beklenen en uzun süre
+
+# ── Auth cache ────────────────────────────────────────────────────────────────
+AUTH_CACHE_TTL          = 60      # Kimlik cache süresi (sn); invalidation Redis ile worker'lara anında yayılır
+AUTH_CACHE_MAX_ENTRIES  = 10000
+LAST_LOGIN_THROTTLE     = 300     # last_login_at en fazla bu aralıkla güncellenir (sn)
+
+# ── Write-behind (chat kayıtları) ─────────────────────────────────────────────
+WRITE_BEHIND_INTERVAL_MS = 200     # Kuyruk en geç bu sürede DB'ye yazılır
+WRITE_BEHIND_BATCH_ROWS  = 200     # Bu kadar satır birikirse beklemeden yazılır
+WRITE_BEHIND_MAX_ROWS    = 10000   # DB yavaş/erişilemezse kuyruk üst sınırı
+
+# ── Chat bağlam toplama ───────────────────────────────────────────────────────
+CONTEXT_WORKERS  = 16     # Profil/fact/duygu/router sorguları için paralel thread
+CONTEXT_DEADLINE = 10.0   # Tüm bağlam toplama adımı için toplam süre (sn)
+LOCATION_WAIT    = 1.5    # Router'ın konum için profil/fact bekleme süresi (sn)
+SPORTS_WORKERS   = 8      # API-Football fixture çağrıları için paralel thread
+SPORTS_DEADLINE  = 6.0    # Spor sorgusunun tüm çağrıları için toplam süre (sn)
+ROUTE_DEADLINE   = 9.0    # route_query'nin tüm adımları (API + aramalar) için toplam süre (sn)
+
+# ── Dış HTTP çağrıları ────────────────────────────────────────────────────────
+HTTP_POOL_SIZE    = 20     # Host başına keep-alive bağlantı havuzu
+HTTP_MAX_HOSTS    = 64     # Session tutulan en fazla host (sayfa içerikleri için LRU)
+HTTP_RETRIES      = 2      # GET için bağlantı hatası / 502-504 sonrası tekrar sayısı
+HTTP_RETRY_BUDGET = 2.0    # Bu süreden sonra tekrar denenmez (sn)
+HTTP_BACKOFF      = 0.2    # Jitter'lı backoff tabanı (sn)
+
+# ── Circuit breaker (veri sağlayıcıları) ─────────────────────────────────────
+BREAKER_FAILURE_THRESHOLD = 5      # Pencere içinde bu kadar hata → devre açılır
+BREAKER_WINDOW            = 60     # Hata sayma penceresi (sn)
+BREAKER_RESET_TIMEOUT     = 30     # Açık devre bu kadar sn sonra tek denemeye izin verir
+BREAKER_SYNC_INTERVAL     = 1.0    # Redis'teki paylaşılan durumun yerelde tazelenme aralığı (sn)
+
+# ── Web search (Serper + Tavily) ──────────────────────────────────────────────
+SEARCH_WORKERS      = 16     # Sağlayıcı çağrıları için paralel thread
+SEARCH_TIMEOUT      = 8.0    # Tek web_search çağrısının üst sınırı (sn)
+SEARCH_HEDGE_DELAY  = 1.5    # Serper gecikme geçmişi yokken Tavily'nin devreye girme süresi (sn)
+SEARCH_HEDGE_MIN    = 0.8    # Hedge gecikmesi Serper p95'inden hesaplanır, bu aralıkta tutulur
+SEARCH_HEDGE_MAX    = 3.0
+SEARCH_NEGATIVE_TTL = 120    # Boş sonuç bu kadar sn cache'lenir
+SEARCH_STALE_RATIO  = 0.25   # Dolu sonuç TTL'inin en fazla bu oranı kadar bayat sunulur
+SEARCH_CACHE_TTL    = {      # recency penceresine göre sonuç TTL'i (sn)
+    'h':  300,
+    'd':  1800,
+    'w':  2 * 3600,
+    'm':  6 * 3600,
+    'y':  24 * 3600,
+    None: 6 * 3600,
+}
+
+PAGE_FETCH_MAX_BYTES = 512 * 1024   # Sayfa içeriği okunurken indirilecek en fazla bayt
+PAGE_CACHE_TTL       = 3600         # Sayfadan çıkarılan metin URL bazında bu kadar sn cache'lenir
+
+# ── Dış API cache (router) ────────────────────────────────────────────────────
+CACHE_MAX_ENTRIES     = 2000   # Worker içi LRU üst sınırı
+CACHE_STALE_WINDOW    = 600    # TTL dolunca eski değer bu kadar daha sunulur, arka planda yenilenir
+CACHE_REFRESH_WORKERS = 4      # Stale-while-revalidate yenileme thread'leri
+CACHE_TTL = {
+    'fx':                 60,
+    'crypto':             60,
+    'weather':            600,
+    'fixtures_live':      60,
+    'fixtures_upcoming':  3 * 3600,   # En geç ilk maçın başlama saatine kadar
+    'fixtures_results':   1800,       # Hepsi bitmiş "son N maç" listesi — yeni maç bitince değişir
+}
+
+# ── Prefetch (sık sorulan router verileri) ────────────────────────────────────
+PREFETCH_FINANCE_INTERVAL  = 45        # USD/EUR kuru + BTC/ETH (sn) — TTL'den kısa
+PREFETCH_WEATHER_INTERVAL  = 8 * 60    # Büyük şehirlerin hava durumu (sn)
+PREFETCH_FIXTURES_INTERVAL = 30 * 60   # Süper Lig son maçlar (sn) — API-Football kotası düşük
+PREFETCH_WEATHER_CITIES    = 8         # TR_CITIES listesinin ilk N şehri
+
+# ── Takım dizini (API-Football) ───────────────────────────────────────────────
+TEAM_DIRECTORY_REFRESH      = 24 * 3600   # Eksik/eskimiş takımları çözme periyodu (sn)
+TEAM_DIRECTORY_MAX_AGE_DAYS = 30          # Bu kadar günlük kayıt API'den tazelenir
+TEAM_FUZZY_MIN_LEN          = 6           # Mesajda daha kısa kelimelerde yazım hatası eşleştirmesi yapılmaz
+TEAM_FUZZY_CUTOFF           = 0.85        # difflib benzerlik eşiği
+
+# ── Proaktif bildirim job'u ───────────────────────────────────────────────────
+NOTIFY_WORKERS        = 8      # Aynı anda üretilen kişisel bildirim (bağlam + gpt-4o)
+NOTIFY_OPENAI_RATE    = 4.0    # gpt-4o bildirim çağrısı / sn — sohbet trafiğine yer kalsın
+NOTIFY_OPENAI_BURST   = 8
+NOTIFY_FCM_RATE       = 500.0  # FCM mesajı / sn (proje kotası 600k/dk)
+NOTIFY_FCM_BURST      = 500
+NOTIFY_SEND_BATCH     = 50     # Üretilen bu kadar bildirim tek send_each ile gider
+NOTIFY_PROGRESS_EVERY = 50     # Her N kullanıcıda ilerleme logu + durum güncellemesi
+
+# ── Zamanlanmış job'lar (çoklu worker / replica) ──────────────────────────────
+LEADER_FAILOVER_WINDOW = 30 * 60   # Lider bu süre içinde ölürse bekleyen process job'u devralır (sn)
+LEADER_POLL_INTERVAL   = 30        # Bekleyen process'lerin kilit/tamamlanma kontrol aralığı (sn)
+
 # ── Redis / Rate limiter ──────────────────────────────────────────────────────
 REDIS_URL = os.getenv('REDIS_URL', 'memory://')
 
@@ -40,6 +162,7 @@ EXCHANGERATE_KEY = os.getenv('EXCHANGERATE_API_KEY')
 
 # ── Firebase ──────────────────────────────────────────────────────────────────
 FIREBASE_CREDENTIALS_JSON = os.getenv('FIREBASE_CREDENTIALS_JSON')
+FCM_BATCH_SIZE            = 500   # send_each / send_each_for_multicast üst sınırı
 
 # ── Admin ─────────────────────────────────────────────────────────────────────
 ADMIN_GOOGLE_IDS = {'117096745782071439494'}
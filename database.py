@@ -1,4 +1,5 @@
 # database.py
+import io
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from psycopg2 import pool as psycopg2_pool
@@ -30,14 +31,31 @@ def get_db():
         conn.cursor_factory = RealDictCursor
     return conn
 
-def release_db(conn):
+def release_db(conn, close=False):
     global _db_pool
     if _db_pool and conn:
         try:
-            _db_pool.putconn(conn)
+            _db_pool.putconn(conn, close=close)
         except Exception:
             pass
 
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def copy_rows(cursor, table, columns, rows):
+    """Satırları COPY ... FROM STDIN (text format) ile tek seferde yazar."""
+    if not rows:
+        return
+    buf = io.StringIO()
+    for row in rows:
+        buf.write('\t'.join(_copy_value(v) for v in row))
+        buf.write('\n')
+    buf.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+
 def run_migrations():
     conn = None
     try:
@@ -49,6 +67,44 @@ def run_migrations():
             ADD COLUMN IF NOT EXISTS notifications_enabled BOOLEAN DEFAULT TRUE,
             ADD COLUMN IF NOT EXISTS last_notified_at TIMESTAMP
         """)
+        cursor.execute("""
+            ALTER TABLE usage_stats
+            ADD COLUMN IF NOT EXISTS cost NUMERIC(12, 6) NOT NULL DEFAULT 0
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS team_directory (
+                keyword    TEXT PRIMARY KEY,
+                team_id    INTEGER NOT NULL,
+                team_name  TEXT NOT NULL,
+                updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS notification_log (
+                id         TEXT PRIMARY KEY,
+                user_id    TEXT NOT NULL,
+                job        TEXT NOT NULL,
+                status     TEXT NOT NULL,
+                error      TEXT,
+                title      TEXT,
+                body       TEXT,
+                sent_at    TIMESTAMP NOT NULL DEFAULT NOW(),
+                opened_at  TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_notification_log_sent_at
+            ON notification_log (sent_at)
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scheduled_job_runs (
+                run_key     TEXT PRIMARY KEY,
+                lock_name   TEXT NOT NULL,
+                status      TEXT NOT NULL,
+                worker      TEXT,
+                finished_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+        """)
         conn.commit()
         cursor.close()
         print("✅ DB migration tamamlandı!")
@@ -7,6 +7,7 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 import psycopg2
 from learning_engine import LearningEngine
+from services.learning import merge_analysis
 
 learning_bp = Blueprint('learning', __name__)
 
@@ -140,48 +141,9 @@ def analyze_message():
             conn = get_db_connection()
             cur = conn.cursor()
             
-            # Save interests
-            for interest in analysis['interests']:
-                print(f"🔍 Saving interest: {interest}")
-                cur.execute("""
-                    INSERT INTO user_facts (device_id, category, fact_key, confidence, source)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (device_id, category, fact_key)
-                    DO UPDATE SET 
-                        confidence = (user_facts.confidence + EXCLUDED.confidence) / 2,
-                        updated_at = CURRENT_TIMESTAMP
-                """, (device_id, interest['category'], interest['fact_key'], 
-                      interest['confidence'], interest['source']))
-                print(f"✅ Interest saved!")
-            
-            # Save location
-            if analysis['location']:
-                print(f"🔍 Saving location: {analysis['location']}")
-                loc = analysis['location']
-                cur.execute("""
-                    INSERT INTO user_facts (device_id, category, fact_key, confidence, source)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (device_id, category, fact_key)
-                    DO UPDATE SET 
-                        confidence = EXCLUDED.confidence,
-                        updated_at = CURRENT_TIMESTAMP
-                """, (device_id, loc['category'], loc['fact_key'], 
-                      loc['confidence'], loc['source']))
-                print(f"✅ Location saved!")
-            
-            # Save personality traits
-            for trait in analysis['personality']:
-                print(f"🔍 Saving trait: {trait}")
-                cur.execute("""
-                    INSERT INTO personality_traits (device_id, trait, score, evidence_count)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (device_id, trait)
-                    DO UPDATE SET 
-                        score = (personality_traits.score + EXCLUDED.score) / 2,
-                        evidence_count = personality_traits.evidence_count + 1,
-                        updated_at = CURRENT_TIMESTAMP
-                """, (device_id, trait['trait'], trait['score'], trait['evidence_count']))
-                print(f"✅ Trait saved!")
+            # Interests, location and traits in a handful of multi-row upserts
+            merge_analysis(cur, device_id, analysis)
+            print(f"✅ Facts merged!")
             
             print(f"🔍 Committing transaction...")
             conn.commit()
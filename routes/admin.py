@@ -0,0 +1,31 @@
+# routes/admin.py
+from flask import Blueprint, request, jsonify
+from auth import require_auth
+from config import ADMIN_GOOGLE_IDS
+from services.ai_service import get_ai_metrics
+from services.cache import get_cache_stats
+from services.search import get_search_stats
+from services.http_client import get_http_metrics
+from services.breaker import get_breaker_stats
+from services.learning import get_extraction_stats
+
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.route('/api/admin/metrics', methods=['GET'])
+@require_auth
+def admin_metrics():
+    """Admin: Worker içi performans metrikleri (bu process'e ait)."""
+    user     = request.user
+    is_admin = user.get('google_id') in ADMIN_GOOGLE_IDS
+    if not is_admin:
+        return jsonify({'error': 'Admin only'}), 403
+
+    return jsonify({
+        'ai':         get_ai_metrics(),
+        'extraction': get_extraction_stats(),
+        'cache':      get_cache_stats(),
+        'search':     get_search_stats(),
+        'http':       get_http_metrics(),
+        'breakers':   get_breaker_stats(),
+    })
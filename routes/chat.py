@@ -1,23 +1,21 @@
 # routes/chat.py
 import json
+import time
+import itertools
 import traceback as tb
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from marshmallow import Schema, fields, validate, ValidationError
 import sentry_sdk
 
 from auth import require_auth
 from config import ADMIN_GOOGLE_IDS, TIER_LIMITS, SENTRY_DSN
-from services.ai_service import get_client
+from services.ai_service import get_client, calculate_cost, ai_call, AISlot
 from services.learning import (
-    get_learned_facts, get_emotion_history, save_emotion,
     build_facts_prompt, build_emotion_summary, build_forgotten_facts_prompt,
     extract_learnings, get_turkey_time,
 )
-from services.router import route_query
-from routes.user import (
-    get_user_profile, check_usage_limit, check_daily_cost_limit,
-    increment_usage, save_message, get_message_count,
-)
+from services.context import UserContext, start_chat_context
+from services.writer import enqueue_message, enqueue_emotion, enqueue_event, enqueue_usage
 
 chat_bp = Blueprint('chat', __name__)
 
@@ -58,34 +56,21 @@ FUNCTIONS = [
 # ── Tracking ──────────────────────────────────────────────────────────────────
 
 def track_event(event_name, user_id=None, properties=None):
-    from database import get_db, release_db
-    conn = None
-    try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO analytics_events (event_name, user_id, properties, created_at)
-            VALUES (%s, %s, %s, NOW())
-            ON CONFLICT DO NOTHING
-        """, (event_name, user_id, json.dumps(properties or {})))
-        conn.commit()
-        cursor.close()
-    except Exception as e:
-        print(f'❌ track_event error: {e}', flush=True)
-    finally:
-        release_db(conn)
+    """Write-behind kuyruğuna alınır, istek yolunda DB'ye gidilmez."""
+    enqueue_event(event_name, user_id, properties)
 
 
 # ── System prompt builder ─────────────────────────────────────────────────────
 
-def build_system_prompt(user, profile, learned_facts, emotion_history,
-                        total_messages, emotion, web_context, turkey_time):
+def build_system_prompt(user_context, emotion, web_context, turkey_time):
+    user           = user_context.user
+    profile        = user_context.profile
     interests      = profile.get('interests', []) if profile else []
     interests_text = ', '.join(interests) if interests else 'çeşitli konular'
 
-    facts_text       = build_facts_prompt(learned_facts)
-    emotion_summary  = build_emotion_summary(emotion_history)
-    forgotten_prompt = build_forgotten_facts_prompt(learned_facts)
+    facts_text       = build_facts_prompt(user_context.learned_facts)
+    emotion_summary  = build_emotion_summary(user_context.emotion_history)
+    forgotten_prompt = build_forgotten_facts_prompt(user_context.learned_facts)
 
     emotional_context = ""
     if emotion == 'sad':
@@ -107,7 +92,7 @@ def build_system_prompt(user, profile, learned_facts, emotion_history,
         f"Kullanıcı: {user['name']}\n"
         f"İlgi alanları: {interests_text}\n"
         f"Bugün: {turkey_time.strftime('%d %B %Y, %A')} | Saat: {turkey_time.strftime('%H:%M')}\n"
-        f"Toplam konuşma: {total_messages} mesaj{relationship_context}"
+        f"Toplam konuşma: {user_context.total_messages} mesaj{relationship_context}"
         f"{emotional_context}"
         f"{emotion_summary}"
         f"{facts_text}"
@@ -168,149 +153,197 @@ def build_web_context(data_result, data_source):
     return ""
 
 
-# ── Ana chat endpoint ─────────────────────────────────────────────────────────
+# ── Chat akışı (ortak adımlar) ────────────────────────────────────────────────
 
-@chat_bp.route('/chat', methods=['POST'])
-@require_auth
-def chat():
-    user     = request.user
-    is_admin = user.get('google_id') in ADMIN_GOOGLE_IDS
-    client   = get_client()
+def _start_chat(user, data):
+    """
+    Kullanıcı snapshot'ı + veri router'ını başlatır, limitleri kontrol eder ve
+    kullanıcı mesajını kaydeder. (ctx, None) veya (None, hata) döner.
+    """
+    is_admin       = user.get('google_id') in ADMIN_GOOGLE_IDS
+    effective_tier = 'pro' if is_admin else user['subscription_tier']
+    user_message   = data.get('message', '')
+    emotion        = data.get('emotion', 'neutral')
+    device_id      = user.get('device_id') or str(user['id'])
 
-    if not client:
-        return jsonify({'response': 'OpenAI bağlantısı kurulamadı'}), 500
-
-    try:
-        schema = ChatSchema()
-        data   = schema.load(request.json)
-    except ValidationError as err:
-        return jsonify({'error': 'Invalid input', 'details': err.messages}), 400
-
-    user_message         = data.get('message', '')
-    conversation_history = data.get('conversation_history', [])
-    emotion              = data.get('emotion', 'neutral')
-    effective_tier       = 'pro' if is_admin else user['subscription_tier']
+    context_job  = start_chat_context(user['id'], device_id, user_message)
+    user_context = context_job.user_context() or UserContext(user=user)
 
     # Limit kontrol
     if not is_admin:
-        usage = check_usage_limit(user['id'], effective_tier)
+        usage = user_context.usage(effective_tier)
         if not usage['allowed']:
+            context_job.cancel()
             track_event('daily_limit_reached', str(user['id']), {'tier': effective_tier})
-            return jsonify({
+            return None, (jsonify({
                 'error':   'daily_limit_exceeded',
                 'message': f"Günlük mesaj limitiniz doldu ({usage['limit']} mesaj). Premium'a geçin!",
                 'limit':   usage['limit'],
                 'current': usage['current'],
-            }), 429
+            }), 429)
 
-        cost_check = check_daily_cost_limit(user['id'], effective_tier)
+        cost_check = user_context.cost(effective_tier)
         if not cost_check['allowed']:
-            return jsonify({
+            context_job.cancel()
+            return None, (jsonify({
                 'error':   'daily_cost_exceeded',
                 'message': "Günlük maliyet limitiniz doldu. Yarın tekrar deneyin!",
-            }), 429
+            }), 429)
 
     # Duygu & mesaj kaydet
-    device_id = user.get('device_id') or str(user['id'])
     if emotion and emotion != 'neutral':
-        save_emotion(device_id, emotion, intensity=0.6, context=user_message[:100])
-    save_message(user['id'], 'user', user_message, emotion=emotion)
+        enqueue_emotion(device_id, emotion, intensity=0.6, context=user_message[:100])
+    enqueue_message(user['id'], 'user', user_message, emotion=emotion)
+    user_context.total_messages += 1  # az önce kaydedilen mesaj
+
+    return {
+        'user':                 user,
+        'device_id':            device_id,
+        'effective_tier':       effective_tier,
+        'user_message':         user_message,
+        'conversation_history': data.get('conversation_history', []),
+        'emotion':              emotion,
+        'user_context':         user_context,
+        'context_job':          context_job,
+    }, None
+
+
+def _build_completion_request(ctx):
+    """Router sonucunu bekler, system prompt'u kurar ve OpenAI istek parametrelerini döner."""
+    effective_tier = ctx['effective_tier']
+    user_message   = ctx['user_message']
+    turkey_time    = get_turkey_time()
+
+    data_result, data_source = ctx['context_job'].route()
+    web_context = build_web_context(data_result, data_source)
+    ctx['data_source'] = data_source
+    ctx['web_context'] = web_context
+
+    # System prompt
+    system_prompt = build_system_prompt(
+        ctx['user_context'], ctx['emotion'], web_context, turkey_time,
+    )
+
+    # Mesaj geçmişi
+    tier_limits   = TIER_LIMITS[effective_tier]
+    history_limit = 10 if effective_tier == 'free' else 50
+
+    messages = [{"role": "system", "content": system_prompt}]
+    if ctx['conversation_history']:
+        messages.extend(ctx['conversation_history'][-history_limit:])
+    messages.append({"role": "user", "content": user_message})
+
+    use_functions = effective_tier != 'free'
+    ctx['model']  = tier_limits.get('model', 'gpt-4o-mini')
+
+    return {
+        'model':         ctx['model'],
+        'messages':      messages,
+        'functions':     FUNCTIONS if use_functions else None,
+        'function_call': {"name": "create_event"} if (use_functions and _should_create_event(user_message)) else None,
+        'max_tokens':    tier_limits['max_tokens'],
+        'temperature':   0.8,
+    }
+
 
+def _finish_chat(ctx, content, token_count, function_call=None, client=None):
+    """Model yanıtı sonrası kayıt/usage/öğrenme işlerini yapar, yanıt gövdesini döner."""
+    user           = ctx['user']
+    effective_tier = ctx['effective_tier']
+    data_source    = ctx.get('data_source')
+
+    track_event('message_sent', str(user['id']), {
+        'tier':        effective_tier,
+        'tokens':      token_count,
+        'emotion':     ctx['emotion'],
+        'data_source': data_source or 'none',
+    })
+
+    # Function call
+    if function_call:
+        if content:
+            enqueue_message(user['id'], 'assistant', content, token_count)
+        enqueue_usage(user['id'], token_count, ctx['model'])
+        return {
+            "response":      content or "Tamam!",
+            "function_call": function_call,
+        }
+
+    # Normal yanıt — boş yanıt geçmişe yazılmaz ama harcanan token faturalanır
+    if content:
+        enqueue_message(user['id'], 'assistant', content, token_count)
+        extract_learnings(user['id'], ctx['user_message'], content, client)
+    enqueue_usage(user['id'], token_count, ctx['model'])
+
+    # Limitler snapshot + bu turun kullanımıyla hesaplanır — tekrar sorgu yok
+    usage_after = ctx['user_context'].usage(effective_tier, extra_messages=1)
+    cost_after  = ctx['user_context'].cost(
+        effective_tier, extra_cost=calculate_cost(token_count, ctx['model']),
+    )
+
+    return {
+        'response':     content,
+        'new_learnings': [],
+        'web_searched': bool(ctx.get('web_context')),
+        'data_source':  data_source or 'none',
+        'audio':        None,
+        'usage': {
+            'remaining': usage_after['remaining'],
+            'limit':     usage_after['limit'],
+        },
+        'cost': {
+            'current': round(cost_after['current_cost'], 4),
+            'max':     cost_after['max_cost'],
+        },
+    }
+
+
+def _load_chat_request():
+    """Schema doğrulaması. (data, None) veya (None, hata) döner."""
     try:
-        turkey_time    = get_turkey_time()
-        profile        = get_user_profile(user['id'])
-        learned_facts  = get_learned_facts(user['id'], 20)
-        emotion_history = get_emotion_history(device_id, days=7)
-        total_messages = get_message_count(user['id'])
-
-        # Kullanıcı konumu
-        user_location = None
-        if profile and profile.get('location'):
-            user_location = profile['location']
-        else:
-            user_location = next(
-                (f['value'] for f in learned_facts if f.get('category') == 'location' and f.get('value')),
-                None
-            )
-
-        # Veri router
-        data_result, data_source = route_query(user_message, user_location)
-        web_context = build_web_context(data_result, data_source)
-
-        # System prompt
-        system_prompt = build_system_prompt(
-            user, profile, learned_facts, emotion_history,
-            total_messages, emotion, web_context, turkey_time,
-        )
+        return ChatSchema().load(request.json), None
+    except ValidationError as err:
+        return None, (jsonify({'error': 'Invalid input', 'details': err.messages}), 400)
+
 
-        # Mesaj geçmişi
-        tier_limits  = TIER_LIMITS[effective_tier]
-        max_tokens   = tier_limits['max_tokens']
-        history_limit = 10 if effective_tier == 'free' else 50
+# ── Ana chat endpoint ─────────────────────────────────────────────────────────
 
-        messages = [{"role": "system", "content": system_prompt}]
-        if conversation_history:
-            messages.extend(conversation_history[-history_limit:])
-        messages.append({"role": "user", "content": user_message})
+@chat_bp.route('/chat', methods=['POST'])
+@require_auth
+def chat():
+    user   = request.user
+    client = get_client()
 
-        use_functions = effective_tier != 'free'
+    if not client:
+        return jsonify({'response': 'OpenAI bağlantısı kurulamadı'}), 500
+
+    data, error = _load_chat_request()
+    if error:
+        return error
+
+    try:
+        ctx, error = _start_chat(user, data)
+        if error:
+            return error
+
+        completion_kwargs = _build_completion_request(ctx)
 
         # OpenAI çağrısı
-        response = client.chat.completions.create(
-            model=TIER_LIMITS[effective_tier].get('model', 'gpt-4o-mini'),
-            messages=messages,
-            functions=FUNCTIONS if use_functions else None,
-            function_call={"name": "create_event"} if (use_functions and _should_create_event(user_message)) else None,
-            max_tokens=max_tokens,
-            temperature=0.8,
-        )
+        response = ai_call('chat', client.chat.completions.create, **completion_kwargs)
 
         assistant_message = response.choices[0].message
         token_count       = response.usage.total_tokens
 
-        track_event('message_sent', str(user['id']), {
-            'tier':        effective_tier,
-            'tokens':      token_count,
-            'emotion':     emotion,
-            'data_source': data_source or 'none',
-        })
-
-        # Function call
+        function_call = None
         if assistant_message.function_call:
-            function_name = assistant_message.function_call.name
-            function_args = json.loads(assistant_message.function_call.arguments)
-            if assistant_message.content:
-                save_message(user['id'], 'assistant', assistant_message.content, token_count)
-            increment_usage(user['id'], token_count)
-            return jsonify({
-                "response":      assistant_message.content or "Tamam!",
-                "function_call": {"name": function_name, "arguments": function_args},
-            })
-
-        # Normal yanıt
-        ai_response = assistant_message.content
-        save_message(user['id'], 'assistant', ai_response, token_count)
-        increment_usage(user['id'], token_count)
-        extract_learnings(user['id'], user_message, ai_response, client)
-
-        usage_after = check_usage_limit(user['id'], effective_tier)
-        cost_after  = check_daily_cost_limit(user['id'], effective_tier)
-
-        return jsonify({
-            'response':     ai_response,
-            'new_learnings': [],
-            'web_searched': bool(web_context),
-            'data_source':  data_source or 'none',
-            'audio':        None,
-            'usage': {
-                'remaining': usage_after['remaining'],
-                'limit':     usage_after['limit'],
-            },
-            'cost': {
-                'current': round(cost_after['current_cost'], 4),
-                'max':     cost_after['max_cost'],
-            },
-        })
+            function_call = {
+                "name":      assistant_message.function_call.name,
+                "arguments": json.loads(assistant_message.function_call.arguments),
+            }
+
+        return jsonify(_finish_chat(
+            ctx, assistant_message.content, token_count, function_call, client,
+        ))
 
     except Exception as e:
         print(f"Chat error: {e}", flush=True)
@@ -318,3 +351,183 @@ def chat():
         if SENTRY_DSN:
             sentry_sdk.capture_exception(e)
         return jsonify({'error': f'Chat error: {str(e)}'}), 500
+
+
+# ── Streaming chat endpoint (SSE) ─────────────────────────────────────────────
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@chat_bp.route('/chat/stream', methods=['POST'])
+@require_auth
+def chat_stream():
+    """
+    /chat ile aynı girdi; yanıt Server-Sent Events olarak akar:
+      event: delta          → {"content": "..."}
+      event: function_call  → {"name": ..., "arguments": {...}}
+      event: done           → /chat yanıt gövdesi + ttft_ms
+      event: error          → {"error": "..."}
+    Kayıt/usage/öğrenme işleri stream kapandıktan sonra yapılır.
+    """
+    user   = request.user
+    client = get_client()
+
+    if not client:
+        return jsonify({'response': 'OpenAI bağlantısı kurulamadı'}), 500
+
+    data, error = _load_chat_request()
+    if error:
+        return error
+
+    slot = None
+    try:
+        ctx, error = _start_chat(user, data)
+        if error:
+            return error
+
+        completion_kwargs = _build_completion_request(ctx)
+
+        # Stream boyunca model kapasitesinden bir yer tutulur
+        slot    = AISlot('chat_stream', completion_kwargs['model']).acquire()
+        started = time.time()
+        stream  = client.chat.completions.create(
+            **completion_kwargs,
+            stream=True,
+            stream_options={"include_usage": True},
+            timeout=slot.timeout,
+        )
+        chunks = iter(stream)
+
+        # İlk token gelene kadar bekle — TTFT header'a yazılabilsin
+        first_chunk = None
+        for chunk in chunks:
+            if chunk.choices and (chunk.choices[0].delta.content or chunk.choices[0].delta.function_call):
+                first_chunk = chunk
+                break
+            if chunk.usage:
+                first_chunk = chunk
+                break
+        ttft_ms = int((time.time() - started) * 1000)
+        print(f"⏱ TTFT {ttft_ms}ms — model={ctx['model']}, user={user['id']}", flush=True)
+
+    except Exception as e:
+        if slot:
+            slot.release(error=True)
+        print(f"Chat stream error: {e}", flush=True)
+        print(tb.format_exc(), flush=True)
+        if SENTRY_DSN:
+            sentry_sdk.capture_exception(e)
+        return jsonify({'error': f'Chat error: {str(e)}'}), 500
+
+    content_parts = []
+    fn_args_parts = []
+    fn_name       = None
+    token_count   = 0
+    settled       = False   # finalize ya da hata sonrası tekrar kayıt yapılmaz
+    head          = [first_chunk] if first_chunk is not None else []
+
+    def consume(chunk):
+        nonlocal fn_name, token_count
+        if chunk.usage:
+            token_count = chunk.usage.total_tokens
+        if not chunk.choices:
+            return None
+        delta = chunk.choices[0].delta
+        if delta.function_call:
+            if delta.function_call.name:
+                fn_name = delta.function_call.name
+            if delta.function_call.arguments:
+                fn_args_parts.append(delta.function_call.arguments)
+        if delta.content:
+            content_parts.append(delta.content)
+        return delta.content
+
+    def finalize():
+        nonlocal settled
+        settled = True
+        function_call = None
+        if fn_name:
+            function_call = {
+                "name":      fn_name,
+                "arguments": json.loads(''.join(fn_args_parts) or '{}'),
+            }
+        payload = _finish_chat(
+            ctx, ''.join(content_parts) or None, token_count, function_call, client,
+        )
+        payload['ttft_ms']  = ttft_ms
+        payload['total_ms'] = int((time.time() - started) * 1000)
+        print(
+            f"⏱ Stream bitti — ttft={ttft_ms}ms, total={payload['total_ms']}ms, tokens={token_count}",
+            flush=True,
+        )
+        return function_call, payload
+
+    def abandon():
+        """Yanıt tamamlanmadan kapandı — upstream kapatılır, kısmi yanıt varsa kaydedilir."""
+        try: stream.close()
+        except Exception: pass
+        slot.release()
+        if settled or not (content_parts or fn_name):
+            return
+        try:
+            finalize()
+        except Exception as e:
+            print(f"Chat stream finalize error: {e}", flush=True)
+
+    def generate():
+        nonlocal settled
+        pending = head[:]
+        head.clear()
+        try:
+            for chunk in itertools.chain(pending, chunks):
+                content = consume(chunk)
+                if content:
+                    yield _sse('delta', {'content': content})
+            slot.release()
+        except GeneratorExit:
+            # İstemci koptu
+            abandon()
+            raise
+        except Exception as e:
+            # Yarım yanıt tamamlanmış gibi kaydedilmez/faturalanmaz; tek terminal event
+            settled = True
+            slot.release(error=True)
+            print(f"Chat stream error: {e}", flush=True)
+            if SENTRY_DSN:
+                sentry_sdk.capture_exception(e)
+            yield _sse('error', {'error': f'Chat error: {str(e)}'})
+            return
+
+        try:
+            function_call, payload = finalize()
+            if function_call:
+                yield _sse('function_call', function_call)
+            yield _sse('done', payload)
+        except Exception as e:
+            print(f"Chat stream finalize error: {e}", flush=True)
+            print(tb.format_exc(), flush=True)
+            if SENTRY_DSN:
+                sentry_sdk.capture_exception(e)
+            yield _sse('error', {'error': f'Chat error: {str(e)}'})
+
+    def on_close():
+        # Generator hiç başlamadan istemci koptuysa ilk chunk henüz işlenmedi
+        for chunk in head:
+            consume(chunk)
+        head.clear()
+        abandon()
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control':          'no-cache',
+            'X-Accel-Buffering':      'no',
+            'X-Time-To-First-Token':  f"{ttft_ms / 1000:.3f}s",
+        },
+    )
+    # Generator hiç çalışmadan kapanırsa da upstream kapansın, slot serbest kalsın
+    response.call_on_close(on_close)
+    return response
+
@@ -2,12 +2,12 @@
 import re
 import base64
 import os
-import requests as req_lib
 from flask import Blueprint, request, jsonify
 from auth import require_auth
-from services.ai_service import get_client
+from services.ai_service import get_client, ai_call
 from database import get_db, release_db
 from config import TAVILY_API_KEY, ADMIN_GOOGLE_IDS
+from services.http_client import http_post
 
 media_bp = Blueprint('media', __name__)
 
@@ -33,7 +33,8 @@ def text_to_speech():
     text = re.sub(r"[^\w\s.,!?'\"()-]", '', text)[:500]
 
     try:
-        response  = client.audio.speech.create(
+        response  = ai_call(
+            'tts', client.audio.speech.create,
             model="tts-1", voice=voice, input=text,
             response_format="mp3", speed=1.0,
         )
@@ -58,7 +59,8 @@ def speech_to_text():
 
     audio_file = request.files['audio']
     try:
-        transcript = client.audio.transcriptions.create(
+        transcript = ai_call(
+            'stt', client.audio.transcriptions.create,
             model="whisper-1",
             file=(
                 audio_file.filename or 'audio.m4a',
@@ -106,7 +108,8 @@ def analyze_image():
         }
         mime_type = mime_map.get(ext, 'image/jpeg')
 
-        response = client.chat.completions.create(
+        response = ai_call(
+            'vision', client.chat.completions.create,
             model='gpt-4o',
             messages=[{
                 'role': 'user',
@@ -183,7 +186,8 @@ def generate_image():
         if not prompt:
             return jsonify({'error': 'Prompt gerekli'}), 400
 
-        enhanced = client.chat.completions.create(
+        enhanced = ai_call(
+            'image', client.chat.completions.create,
             model='gpt-4o-mini',
             messages=[{
                 'role': 'user',
@@ -196,7 +200,8 @@ def generate_image():
         )
         english_prompt = enhanced.choices[0].message.content.strip()
 
-        image_response = client.images.generate(
+        image_response = ai_call(
+            'image', client.images.generate,
             model='dall-e-3', prompt=english_prompt,
             size='1024x1024', quality='standard', n=1,
         )
@@ -232,7 +237,7 @@ def search_images():
         if not TAVILY_API_KEY:
             return jsonify({'error': 'Arama servisi yapılandırılmamış'}), 500
 
-        response = req_lib.post(
+        response = http_post(
             'https://api.tavily.com/search',
             json={
                 'api_key':       TAVILY_API_KEY,
@@ -4,8 +4,8 @@ from auth import require_auth
 from config import ADMIN_GOOGLE_IDS
 from database import get_db, release_db
 from services.scheduler import (
-    send_push_notification, generate_personalized_notification,
-    run_notification_job, scheduler,
+    send_push_notification, send_push_multicast, generate_personalized_notification,
+    run_exclusive_notification_job, scheduler, get_notification_reports,
 )
 from services.ai_service import get_client
 from services.learning import get_turkey_time
@@ -108,6 +108,36 @@ def toggle_notifications():
         release_db(conn)
 
 
+@notifications_bp.route('/api/notifications/opened', methods=['POST'])
+@require_auth
+def notification_opened():
+    """Uygulama bildirimden açıldığında notification_log'a açılma zamanı yazılır."""
+    conn = None
+    try:
+        user            = request.user
+        data            = request.get_json() or {}
+        notification_id = str(data.get('notification_id', '')).strip()
+
+        if not notification_id:
+            return jsonify({'error': 'notification_id gerekli'}), 400
+
+        conn   = get_db()
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE notification_log
+            SET opened_at = NOW()
+            WHERE id = %s AND user_id = %s AND opened_at IS NULL
+        """, (notification_id, str(user['id'])))
+        conn.commit()
+        cursor.close()
+        return jsonify({'success': True})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        release_db(conn)
+
+
 @notifications_bp.route('/api/notifications/test', methods=['POST'])
 @require_auth
 def test_notification():
@@ -157,6 +187,7 @@ def scheduler_status():
     return jsonify({
         'running':     scheduler.running,
         'jobs':        jobs,
+        'last_runs':   get_notification_reports(),
         'turkey_time': get_turkey_time().strftime('%d.%m.%Y %H:%M'),
     })
 
@@ -200,22 +231,12 @@ def broadcast_notification():
             users = cursor.fetchall()
             cursor.close()
 
-            success = 0
-            fail    = 0
-            for u in users:
-                from services.scheduler import send_push_notification, update_last_notified
-                sent = send_push_notification(
-                    fcm_token=u['fcm_token'],
-                    title=title,
-                    body=body,
-                    data={'type': 'broadcast', 'screen': 'chat'}
-                )
-                if sent:
-                    success += 1
-                else:
-                    fail += 1
-                import time
-                time.sleep(0.3)
+            success, fail = send_push_multicast(
+                [u['fcm_token'] for u in users],
+                title=title,
+                body=body,
+                data={'type': 'broadcast', 'screen': 'chat'},
+            )
 
             print(f"📢 Broadcast bitti: {success} başarılı, {fail} başarısız", flush=True)
         except Exception as e:
@@ -237,8 +258,9 @@ def trigger_notification_job():
 
     import threading
     t = threading.Thread(
-        target=run_notification_job,
+        target=run_exclusive_notification_job,
         args=("manual",),
+        kwargs={'scheduled': False},
         daemon=True,
     )
     t.start()
@@ -2,7 +2,7 @@
 import json
 from flask import Blueprint, request, jsonify
 from marshmallow import Schema, fields, validate, ValidationError
-from auth import require_auth
+from auth import require_auth, invalidate_user_cache
 from database import get_db, release_db
 from config import TIER_LIMITS, ADMIN_GOOGLE_IDS
 from services.learning import get_emotion_history
@@ -67,6 +67,7 @@ def save_or_update_profile(user_id, profile_data):
         ))
         conn.commit()
         cursor.close()
+        invalidate_user_cache(user_id)
         return True
     except Exception as e:
         if conn:
@@ -76,6 +77,27 @@ def save_or_update_profile(user_id, profile_data):
         release_db(conn)
 
 
+def build_usage_status(current, tier='free'):
+    limit = TIER_LIMITS[tier]['daily_messages']
+    return {
+        'allowed':   current < limit,
+        'current':   current,
+        'limit':     limit,
+        'remaining': max(0, limit - current),
+    }
+
+
+def build_cost_status(cost, tier='free'):
+    from config import MAX_DAILY_COST_PER_USER
+    max_cost = MAX_DAILY_COST_PER_USER.get(tier, 0.10)
+    return {
+        'allowed':        cost < max_cost,
+        'current_cost':   cost,
+        'max_cost':       max_cost,
+        'remaining_cost': max(0, max_cost - cost),
+    }
+
+
 def check_usage_limit(user_id, tier='free'):
     from services.learning import get_turkey_time
     conn = None
@@ -89,62 +111,51 @@ def check_usage_limit(user_id, tier='free'):
         """, (user_id, today))
         stats   = cursor.fetchone()
         current = stats['message_count'] if stats else 0
-        limit   = TIER_LIMITS[tier]['daily_messages']
         cursor.close()
-        return {
-            'allowed':   current < limit,
-            'current':   current,
-            'limit':     limit,
-            'remaining': max(0, limit - current),
-        }
+        return build_usage_status(current, tier)
     finally:
         release_db(conn)
 
 
 def check_daily_cost_limit(user_id, tier='free'):
+    """Günlük maliyet usage_stats.cost sayacından okunur (yazarken hesaplanır)."""
     from services.learning import get_turkey_time
-    from services.ai_service import calculate_cost
-    from config import MAX_DAILY_COST_PER_USER
     conn = None
     try:
         conn = get_db()
         cursor = conn.cursor()
         today = get_turkey_time().date()
         cursor.execute("""
-            SELECT COALESCE(SUM(token_count), 0) AS total_tokens
-            FROM messages WHERE user_id = %s AND DATE(created_at) = %s
+            SELECT cost FROM usage_stats
+            WHERE user_id = %s AND date = %s
         """, (user_id, today))
-        result       = cursor.fetchone()
-        total_tokens = result['total_tokens'] if result else 0
-        cost         = calculate_cost(total_tokens)
-        max_cost     = MAX_DAILY_COST_PER_USER.get(tier, 0.10)
+        stats = cursor.fetchone()
+        cost  = float(stats['cost']) if stats and stats['cost'] is not None else 0.0
         cursor.close()
-        return {
-            'allowed':        cost < max_cost,
-            'current_cost':   cost,
-            'max_cost':       max_cost,
-            'remaining_cost': max(0, max_cost - cost),
-        }
+        return build_cost_status(cost, tier)
     finally:
         release_db(conn)
 
 
-def increment_usage(user_id, token_count=0):
+def increment_usage(user_id, token_count=0, model='gpt-4o-mini'):
     from services.learning import get_turkey_time
+    from services.ai_service import calculate_cost
     conn = None
     try:
         conn = get_db()
         cursor = conn.cursor()
         today = get_turkey_time().date()
+        cost  = calculate_cost(token_count, model)
         cursor.execute("""
-            INSERT INTO usage_stats (user_id, date, message_count, token_count)
-            VALUES (%s, %s, 1, %s)
+            INSERT INTO usage_stats (user_id, date, message_count, token_count, cost)
+            VALUES (%s, %s, 1, %s, %s)
             ON CONFLICT (user_id, date)
             DO UPDATE SET
                 message_count = usage_stats.message_count + 1,
-                token_count   = usage_stats.token_count + %s,
+                token_count   = usage_stats.token_count + EXCLUDED.token_count,
+                cost          = usage_stats.cost + EXCLUDED.cost,
                 updated_at    = NOW()
-        """, (user_id, today, token_count, token_count))
+        """, (user_id, today, token_count, cost))
         conn.commit()
         cursor.close()
     except Exception as e:
@@ -300,6 +311,7 @@ def delete_account():
         )
         conn.commit()
         cursor.close()
+        invalidate_user_cache(user['id'])
         print(f"✅ Hesap silindi: {user['id']}", flush=True)
         return jsonify({'success': True})
 
@@ -330,6 +342,7 @@ def upgrade_subscription():
         )
         conn.commit()
         cursor.close()
+        invalidate_user_cache(user['id'])
         return jsonify({'success': True, 'tier': tier})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,19 +1,162 @@
 # services/ai_service.py
+"""
+AI gateway — tüm OpenAI çağrıları (chat, extraction, bildirim, TTS/STT, görsel)
+tek bir ayarlanabilir httpx havuzu üzerinden gider. Model başına eşzamanlılık
+sınırı uygulanır; her çağrı için kuyrukta bekleme ve upstream süresi ölçülür.
+
+    response = ai_call('chat', client.chat.completions.create, model=..., messages=...)
+
+Stream gibi uzun süren çağrılarda AISlot doğrudan kullanılır.
+"""
+import time
+import threading
+import httpx
 from openai import OpenAI
-from config import OPENAI_API_KEY
+from config import (
+    OPENAI_API_KEY,
+    AI_MAX_CONNECTIONS, AI_MAX_KEEPALIVE, AI_KEEPALIVE_EXPIRY, AI_HTTP2,
+    AI_QUEUE_TIMEOUT, AI_DEFAULT_CONCURRENCY, AI_MODEL_CONCURRENCY, AI_CALL_TIMEOUTS,
+)
+
+try:
+    import h2  # noqa: F401 — httpx HTTP/2 desteği için gerekli
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_client      = None
+_client_lock = threading.Lock()
+
+
+def _http_options():
+    return {
+        'limits': httpx.Limits(
+            max_connections=AI_MAX_CONNECTIONS,
+            max_keepalive_connections=AI_MAX_KEEPALIVE,
+            keepalive_expiry=AI_KEEPALIVE_EXPIRY,
+        ),
+        'timeout': httpx.Timeout(AI_CALL_TIMEOUTS['default'], connect=10.0),
+        'http2':   AI_HTTP2 and HTTP2_AVAILABLE,
+    }
 
-_client = None
 
 def get_client():
     global _client
     if _client is None:
         if not OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY bulunamadı!")
-        _client = OpenAI(api_key=OPENAI_API_KEY)
-        print("✅ OpenAI client başlatıldı!")
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(api_key=OPENAI_API_KEY, http_client=httpx.Client(**_http_options()))
+                print(f"✅ OpenAI client başlatıldı! (http2={_http_options()['http2']})")
     return _client
 
 
+def timeout_for(call_type):
+    return AI_CALL_TIMEOUTS.get(call_type, AI_CALL_TIMEOUTS['default'])
+
+
+# ── Eşzamanlılık + metrikler ──────────────────────────────────────────────────
+
+_semaphores   = {}
+_metrics      = {}
+_in_flight    = {}
+_metrics_lock = threading.Lock()
+
+
+def _semaphore(model):
+    sem = _semaphores.get(model)
+    if sem is None:
+        with _metrics_lock:
+            sem = _semaphores.get(model)
+            if sem is None:
+                limit = AI_MODEL_CONCURRENCY.get(model, AI_DEFAULT_CONCURRENCY)
+                sem   = threading.BoundedSemaphore(limit)
+                _semaphores[model] = sem
+    return sem
+
+
+def _record(call_type, queue_s, upstream_s, error):
+    with _metrics_lock:
+        m = _metrics.setdefault(call_type, {
+            'calls': 0, 'errors': 0,
+            'queue_ms_total': 0.0, 'queue_ms_max': 0.0,
+            'upstream_ms_total': 0.0, 'upstream_ms_max': 0.0,
+        })
+        m['calls']             += 1
+        m['errors']            += 1 if error else 0
+        m['queue_ms_total']    += queue_s * 1000
+        m['queue_ms_max']       = max(m['queue_ms_max'], queue_s * 1000)
+        m['upstream_ms_total'] += upstream_s * 1000
+        m['upstream_ms_max']    = max(m['upstream_ms_max'], upstream_s * 1000)
+
+
+class AISlot:
+    """Model kapasitesinden bir yer ayırır; kuyruk ve upstream süresini ölçer."""
+
+    def __init__(self, call_type, model):
+        self.call_type = call_type
+        self.model     = model or 'default'
+        self.timeout   = timeout_for(call_type)
+        self._sem      = _semaphore(self.model)
+        self._acquired = None
+        self._queue_s  = 0.0
+
+    def acquire(self):
+        started = time.perf_counter()
+        if not self._sem.acquire(timeout=AI_QUEUE_TIMEOUT):
+            _record(self.call_type, time.perf_counter() - started, 0.0, True)
+            raise RuntimeError(f"AI kapasitesi dolu ({self.model}), lütfen tekrar deneyin")
+        self._acquired = time.perf_counter()
+        self._queue_s  = self._acquired - started
+        with _metrics_lock:
+            _in_flight[self.model] = _in_flight.get(self.model, 0) + 1
+        return self
+
+    def release(self, error=False):
+        if self._acquired is None:
+            return
+        upstream_s, self._acquired = time.perf_counter() - self._acquired, None
+        with _metrics_lock:
+            _in_flight[self.model] = _in_flight.get(self.model, 1) - 1
+        self._sem.release()
+        _record(self.call_type, self._queue_s, upstream_s, error)
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release(error=exc_type is not None)
+        return False
+
+
+def ai_call(call_type, fn, **kwargs):
+    """OpenAI SDK çağrısını havuz/limit/metrik katmanından geçirir."""
+    with AISlot(call_type, kwargs.get('model')) as slot:
+        kwargs.setdefault('timeout', slot.timeout)
+        return fn(**kwargs)
+
+
+def get_ai_metrics():
+    with _metrics_lock:
+        calls = {}
+        for call_type, m in _metrics.items():
+            n = m['calls'] or 1
+            calls[call_type] = {
+                'calls':           m['calls'],
+                'errors':          m['errors'],
+                'queue_ms_avg':    round(m['queue_ms_total'] / n, 1),
+                'queue_ms_max':    round(m['queue_ms_max'], 1),
+                'upstream_ms_avg': round(m['upstream_ms_total'] / n, 1),
+                'upstream_ms_max': round(m['upstream_ms_max'], 1),
+            }
+        return {
+            'http2':     AI_HTTP2 and HTTP2_AVAILABLE,
+            'in_flight': dict(_in_flight),
+            'calls':     calls,
+        }
+
+
 def calculate_cost(tokens, model='gpt-4o-mini'):
     costs = {
         'gpt-4o-mini': 0.00015,
@@ -0,0 +1,192 @@
+# services/breaker.py
+"""
+Dış veri sağlayıcıları için circuit breaker (closed → open → half-open).
+
+Bir sağlayıcı BREAKER_WINDOW içinde BREAKER_FAILURE_THRESHOLD kez hata verirse
+devre açılır ve BREAKER_RESET_TIMEOUT boyunca çağrılar ağa çıkmadan
+CircuitOpenError ile reddedilir; router bir sonraki adıma geçer. Süre dolunca
+tek bir deneme çağrısına izin verilir (half-open): başarılıysa devre kapanır,
+değilse yeniden açılır.
+
+Durum REDIS_URL Redis ise worker'lar/replica'lar arasında paylaşılır (yerel
+kopya BREAKER_SYNC_INTERVAL'de bir tazelenir); Redis yoksa ya da erişilemezse
+her worker kendi durumunu tutar.
+"""
+import time
+import threading
+from collections import deque
+from config import (
+    BREAKER_FAILURE_THRESHOLD, BREAKER_WINDOW, BREAKER_RESET_TIMEOUT, BREAKER_SYNC_INTERVAL,
+)
+from services.cache import get_redis
+
+REDIS_KEY_PREFIX = 'dostai:breaker:'
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name):
+        super().__init__(f"circuit open: {name}")
+        self.name = name
+
+
+class CircuitBreaker:
+    def __init__(self, name, threshold=BREAKER_FAILURE_THRESHOLD,
+                 window=BREAKER_WINDOW, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.name          = name
+        self.threshold     = threshold
+        self.window        = window
+        self.reset_timeout = reset_timeout
+
+        self._lock       = threading.Lock()
+        self._failures   = deque()   # yerel mod: son hata zamanları
+        self._open_until = None      # epoch; None = kapalı, geçmişte = half-open
+        self._probe_at   = 0.0       # yerel mod: half-open deneme zamanı
+        self._synced_at  = 0.0
+        self._stats      = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def _key(self, suffix):
+        return f"{REDIS_KEY_PREFIX}{self.name}:{suffix}"
+
+    # ── Durum ────────────────────────────────────────────────────────────────
+
+    def _current_open_until(self):
+        r = get_redis()
+        if r is None:
+            return self._open_until
+        now = time.monotonic()
+        if now - self._synced_at >= BREAKER_SYNC_INTERVAL:
+            try:
+                raw = r.get(self._key('open_until'))
+                self._open_until = float(raw) if raw else None
+                self._synced_at  = now
+            except Exception:
+                pass
+        return self._open_until
+
+    @property
+    def state(self):
+        until = self._current_open_until()
+        if until is None:
+            return 'closed'
+        return 'open' if time.time() < until else 'half_open'
+
+    def allow(self):
+        """Çağrı yapılabilir mi? Açık devrede False; half-open'da tek deneme True."""
+        until = self._current_open_until()
+        if until is None:
+            return True
+        if time.time() < until:
+            self._count('rejected')
+            return False
+        if self._acquire_probe():
+            return True
+        self._count('rejected')
+        return False
+
+    def _acquire_probe(self):
+        # Deneme çağrısı en fazla reset_timeout sürer; takılırsa bir sonraki denemeye izin verilir
+        r = get_redis()
+        if r is not None:
+            try:
+                return bool(r.set(self._key('probe'), '1', nx=True, ex=max(1, int(self.reset_timeout))))
+            except Exception:
+                pass
+        with self._lock:
+            now = time.monotonic()
+            if now - self._probe_at < self.reset_timeout:
+                return False
+            self._probe_at = now
+            return True
+
+    # ── Sonuç kaydı ──────────────────────────────────────────────────────────
+
+    def record_success(self):
+        self._count('calls')
+        # Sadece half-open deneme devreyi kapatır; açılmadan önce başlamış çağrılar etkilemez
+        if self._open_until is None or time.time() < self._open_until:
+            return
+        with self._lock:
+            self._open_until = None
+            self._probe_at   = 0.0
+            self._failures.clear()
+        r = get_redis()
+        if r is not None:
+            try:
+                r.delete(self._key('open_until'), self._key('probe'), self._key('failures'))
+            except Exception:
+                pass
+        print(f"✅ Circuit closed: {self.name}", flush=True)
+
+    def record_failure(self):
+        self._count('calls')
+        self._count('failures')
+        if self._open_until is not None:
+            if time.time() >= self._open_until:
+                self._open()   # half-open deneme başarısız
+            return
+        if self._failure_count() >= self.threshold:
+            self._open()
+
+    def _failure_count(self):
+        r = get_redis()
+        if r is not None:
+            try:
+                count = r.incr(self._key('failures'))
+                if count == 1:
+                    r.expire(self._key('failures'), self.window)
+                return int(count)
+            except Exception:
+                pass
+        with self._lock:
+            now = time.monotonic()
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.window:
+                self._failures.popleft()
+            return len(self._failures)
+
+    def _open(self):
+        until = time.time() + self.reset_timeout
+        with self._lock:
+            self._open_until = until
+            self._probe_at   = 0.0
+            self._failures.clear()
+        r = get_redis()
+        if r is not None:
+            try:
+                pipe = r.pipeline()
+                # Anahtar half-open süresince de kalmalı — devre ancak başarılı denemeyle kapanır
+                pipe.set(self._key('open_until'), until, ex=int(self.reset_timeout * 10))
+                pipe.delete(self._key('probe'), self._key('failures'))
+                pipe.execute()
+            except Exception:
+                pass
+        self._count('opened')
+        print(f"⚠️ Circuit open: {self.name} ({self.reset_timeout}s)", flush=True)
+
+    def _count(self, field):
+        with self._lock:
+            self._stats[field] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['state'] = self.state
+        return stats
+
+
+_registry_lock = threading.Lock()
+_breakers      = {}
+
+
+def get_breaker(name):
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def get_breaker_stats():
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.stats() for b in breakers}
@@ -0,0 +1,264 @@
+# services/cache.py
+"""
+Dış API'ler için paylaşılan TTL cache.
+
+Katmanlar: worker içi LRU → Redis (REDIS_URL redis:// ise, worker'lar arası
+paylaşılır) → loader. TTL dolduğunda değer CACHE_STALE_WINDOW boyunca sunulmaya
+devam eder ve arka planda yenilenir (stale-while-revalidate). Aynı anahtar için
+eşzamanlı miss'lerde loader tek kez çalışır.
+"""
+import json
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from config import REDIS_URL, CACHE_MAX_ENTRIES, CACHE_STALE_WINDOW, CACHE_REFRESH_WORKERS
+
+REDIS_KEY_PREFIX = 'dostai:cache:'
+REDIS_RETRY_AFTER = 30   # Redis hatasından sonra bu kadar sn sadece yerel cache
+
+_lock       = threading.Lock()
+_entries    = OrderedDict()   # key -> (value, fresh_until, stale_until)
+_inflight   = {}              # key -> _Flight
+_refreshing = set()
+_stats      = {}              # source -> sayaçlar
+
+_refresher = ThreadPoolExecutor(max_workers=CACHE_REFRESH_WORKERS, thread_name_prefix='cache-refresh')
+
+_redis            = None
+_redis_down_until = 0.0
+
+
+# ── Redis ─────────────────────────────────────────────────────────────────────
+
+def get_redis():
+    """REDIS_URL gerçek bir Redis ise paylaşılan client, değilse (memory://) None."""
+    global _redis
+    if not REDIS_URL.startswith(('redis://', 'rediss://')):
+        return None
+    if time.monotonic() < _redis_down_until:
+        return None
+    if _redis is None:
+        try:
+            import redis
+            _redis = redis.Redis.from_url(
+                REDIS_URL, socket_timeout=0.25, socket_connect_timeout=0.25,
+            )
+        except Exception as e:
+            print(f"⚠️ Redis client error: {e}", flush=True)
+            _mark_redis_down()
+            return None
+    return _redis
+
+
+def _mark_redis_down():
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+
+def _redis_get(key):
+    r = get_redis()
+    if r is None:
+        return None
+    try:
+        raw = r.get(REDIS_KEY_PREFIX + key)
+        return json.loads(raw) if raw else None
+    except Exception as e:
+        print(f"⚠️ Redis cache get error: {e}", flush=True)
+        _mark_redis_down()
+        return None
+
+
+def _redis_set(key, value, fresh_until_epoch, expire_s):
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        payload = json.dumps({'v': value, 'f': fresh_until_epoch}, ensure_ascii=False)
+        r.set(REDIS_KEY_PREFIX + key, payload, ex=max(1, int(expire_s)))
+    except Exception as e:
+        print(f"⚠️ Redis cache set error: {e}", flush=True)
+        _mark_redis_down()
+
+
+# ── Yerel LRU ─────────────────────────────────────────────────────────────────
+
+def _local_get(key):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+        return entry
+
+
+def _local_put(key, value, fresh_until, stale_until):
+    with _lock:
+        _entries[key] = (value, fresh_until, stale_until)
+        _entries.move_to_end(key)
+        while len(_entries) > CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def _count(source, field, n=1):
+    with _lock:
+        s = _stats.setdefault(source, {
+            'hits': 0, 'redis_hits': 0, 'stale': 0, 'misses': 0,
+            'loads': 0, 'errors': 0, 'load_ms_total': 0.0,
+        })
+        s[field] += n
+
+
+# ── Yükleme ───────────────────────────────────────────────────────────────────
+
+class _Flight:
+    def __init__(self):
+        self.done  = threading.Event()
+        self.value = None
+
+
+def _resolve(setting, value):
+    return setting(value) if callable(setting) else setting
+
+
+def _load(source, key, loader, ttl, stale):
+    """Loader'ı çalıştırır, sonucu yerel cache'e ve Redis'e yazar. None cache'lenmez."""
+    started = time.monotonic()
+    try:
+        value = loader()
+    except Exception as e:
+        print(f"⚠️ Cache loader error ({source}): {e}", flush=True)
+        value = None
+    _count(source, 'loads')
+    _count(source, 'load_ms_total', (time.monotonic() - started) * 1000)
+
+    if value is None:
+        _count(source, 'errors')
+        return None
+
+    ttl_s = _resolve(ttl, value)
+    if ttl_s and ttl_s > 0:
+        stale_s = _resolve(stale, value)
+        now = time.monotonic()
+        _local_put(key, value, now + ttl_s, now + ttl_s + stale_s)
+        _redis_set(key, value, time.time() + ttl_s, ttl_s + stale_s)
+    return value
+
+
+def _load_once(source, key, loader, ttl, stale, wait=15):
+    """Aynı anahtar için eşzamanlı miss'leri tek loader çağrısında birleştirir."""
+    with _lock:
+        flight = _inflight.get(key)
+        owner  = flight is None
+        if owner:
+            flight = _inflight[key] = _Flight()
+
+    if not owner:
+        flight.done.wait(timeout=wait)
+        return flight.value
+
+    try:
+        flight.value = _load(source, key, loader, ttl, stale)
+        return flight.value
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+
+
+def _refresh(source, key, loader, ttl, stale):
+    try:
+        _load_once(source, key, loader, ttl, stale)
+    finally:
+        with _lock:
+            _refreshing.discard(key)
+
+
+def _schedule_refresh(source, key, loader, ttl, stale):
+    with _lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    _refresher.submit(_refresh, source, key, loader, ttl, stale)
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+def cached(source, key, loader, ttl, stale=CACHE_STALE_WINDOW, wait=15):
+    """
+    source: metrik grubu ('fx', 'weather', ...); key: source içinde benzersiz anahtar.
+    loader: değeri getiren fonksiyon (JSON'a çevrilebilir değer ya da hata için None).
+    ttl:    saniye ya da değere göre TTL döndüren fonksiyon (<= 0 → cache'leme).
+    stale:  TTL sonrası eski değerin sunulacağı süre (saniye ya da fonksiyon).
+    wait:   aynı anahtarı yükleyen başka bir çağrının en fazla ne kadar bekleneceği.
+    """
+    full_key = f"{source}:{key}"
+    now      = time.monotonic()
+
+    entry = _local_get(full_key)
+    if entry is not None:
+        value, fresh_until, stale_until = entry
+        if now < fresh_until:
+            _count(source, 'hits')
+            return value
+        if now < stale_until:
+            _count(source, 'stale')
+            _schedule_refresh(source, full_key, loader, ttl, stale)
+            return value
+
+    shared = _redis_get(full_key)
+    if shared is not None:
+        remaining = shared['f'] - time.time()
+        if remaining > 0:
+            _local_put(full_key, shared['v'], now + remaining, now + remaining + _resolve(stale, shared['v']))
+            _count(source, 'redis_hits')
+            return shared['v']
+        # Redis'teki kopya da bayat ama stale penceresinde (yoksa expire olurdu)
+        _local_put(full_key, shared['v'], now, now + _resolve(stale, shared['v']) + remaining)
+        _count(source, 'stale')
+        _schedule_refresh(source, full_key, loader, ttl, stale)
+        return shared['v']
+
+    _count(source, 'misses')
+    return _load_once(source, full_key, loader, ttl, stale, wait)
+
+
+def refresh_cached(source, key, loader, ttl, stale=CACHE_STALE_WINDOW):
+    """TTL'e bakmadan yeniden yükler ve cache'e yazar (zamanlanmış prefetch için)."""
+    return _load_once(source, f"{source}:{key}", loader, ttl, stale)
+
+
+def invalidate(source, key):
+    full_key = f"{source}:{key}"
+    with _lock:
+        _entries.pop(full_key, None)
+    r = get_redis()
+    if r is not None:
+        try:
+            r.delete(REDIS_KEY_PREFIX + full_key)
+        except Exception:
+            _mark_redis_down()
+
+
+def get_cache_stats():
+    with _lock:
+        sources = {}
+        for source, s in _stats.items():
+            served = s['hits'] + s['redis_hits'] + s['stale']
+            total  = served + s['misses']
+            loads  = s['loads']
+            sources[source] = {
+                'hits':        s['hits'],
+                'redis_hits':  s['redis_hits'],
+                'stale':       s['stale'],
+                'misses':      s['misses'],
+                'loads':       s['loads'],
+                'errors':      s['errors'],
+                'hit_rate':    round(served / total, 3) if total else None,
+                'avg_load_ms': round(s['load_ms_total'] / loads, 1) if loads else None,
+            }
+        return {
+            'entries':     len(_entries),
+            'max_entries': CACHE_MAX_ENTRIES,
+            'redis':       get_redis() is not None,
+            'sources':     sources,
+        }
@@ -0,0 +1,193 @@
+# services/context.py
+import time
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional
+from config import CONTEXT_WORKERS, CONTEXT_DEADLINE, LOCATION_WAIT
+from database import get_db, release_db
+
+_executor = ThreadPoolExecutor(max_workers=CONTEXT_WORKERS, thread_name_prefix='chat-ctx')
+
+
+# ── Kullanıcı snapshot'ı ──────────────────────────────────────────────────────
+
+@dataclass
+class UserContext:
+    """Bir chat turu için gereken tüm kullanıcı verisi — tek sorguda yüklenir."""
+    user:            dict
+    profile:         Optional[dict] = None
+    learned_facts:   list = field(default_factory=list)
+    emotion_history: list = field(default_factory=list)
+    total_messages:  int = 0
+    messages_today:  int = 0
+    cost_today:      float = 0.0
+
+    @property
+    def location(self):
+        return resolve_user_location(self.profile, self.learned_facts)
+
+    def usage(self, tier, extra_messages=0):
+        from routes.user import build_usage_status
+        return build_usage_status(self.messages_today + extra_messages, tier)
+
+    def cost(self, tier, extra_cost=0.0):
+        from routes.user import build_cost_status
+        return build_cost_status(self.cost_today + extra_cost, tier)
+
+
+def resolve_user_location(profile, learned_facts):
+    if profile and profile.get('location'):
+        return profile['location']
+    return next(
+        (f['value'] for f in learned_facts or [] if f.get('category') == 'location' and f.get('value')),
+        None
+    )
+
+
+_CTX_PREFIX = '_ctx_'
+
+USER_CONTEXT_SQL = """
+    SELECT
+        u.*,
+        (
+            SELECT row_to_json(p)
+            FROM (
+                SELECT up.*, u.name, u.nickname
+                FROM user_profiles up
+                WHERE up.user_id = u.id
+            ) p
+        ) AS _ctx_profile,
+        (
+            SELECT COALESCE(json_agg(f ORDER BY f.rank), '[]'::json)
+            FROM (
+                SELECT
+                    category,
+                    fact_key   AS value,
+                    fact_value AS context,
+                    confidence,
+                    COALESCE(importance, 0.5)    AS importance,
+                    COALESCE(frequency, 1)       AS frequency,
+                    COALESCE(last_mentioned, updated_at::date) AS last_mentioned,
+                    source,
+                    updated_at,
+                    ROW_NUMBER() OVER (
+                        ORDER BY
+                            (COALESCE(importance, 0.5) * confidence * LN(COALESCE(frequency, 1) + 1)) DESC,
+                            updated_at DESC
+                    ) AS rank
+                FROM user_facts
+                WHERE device_id = u.device_id AND confidence > 0.2
+                ORDER BY rank
+                LIMIT %(fact_limit)s
+            ) f
+        ) AS _ctx_facts,
+        (
+            SELECT COALESCE(json_agg(e ORDER BY e.created_at DESC), '[]'::json)
+            FROM (
+                SELECT emotion, intensity, context, created_at
+                FROM user_emotion_history
+                WHERE device_id = %(device_id)s
+                  AND created_at >= NOW() - %(emotion_days)s * INTERVAL '1 day'
+                ORDER BY created_at DESC
+                LIMIT 50
+            ) e
+        ) AS _ctx_emotions,
+        (
+            SELECT COUNT(*) FROM messages WHERE user_id = u.id
+        ) AS _ctx_total_messages,
+        us.message_count AS _ctx_messages_today,
+        us.cost          AS _ctx_cost_today
+    FROM users u
+    LEFT JOIN usage_stats us ON us.user_id = u.id AND us.date = %(today)s
+    WHERE u.id = %(user_id)s
+"""
+
+
+def load_user_context(user_id, device_id, fact_limit=20, emotion_days=7):
+    """Kullanıcı, profil, fact, duygu, mesaj sayısı ve günlük kullanımı tek round trip'te okur."""
+    from services.learning import get_turkey_time
+    conn = None
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute(USER_CONTEXT_SQL, {
+            'user_id':      user_id,
+            'device_id':    device_id,
+            'fact_limit':   fact_limit,
+            'emotion_days': emotion_days,
+            'today':        get_turkey_time().date(),
+        })
+        row = cursor.fetchone()
+        cursor.close()
+        if not row:
+            return None
+        row = dict(row)
+        return UserContext(
+            user={k: v for k, v in row.items() if not k.startswith(_CTX_PREFIX)},
+            profile=row['_ctx_profile'],
+            learned_facts=row['_ctx_facts'] or [],
+            emotion_history=row['_ctx_emotions'] or [],
+            total_messages=int(row['_ctx_total_messages'] or 0),
+            messages_today=int(row['_ctx_messages_today'] or 0),
+            cost_today=float(row['_ctx_cost_today'] or 0),
+        )
+    finally:
+        release_db(conn)
+
+
+# ── Paralel bağlam toplama ────────────────────────────────────────────────────
+
+class ChatContextJob:
+    """
+    Kullanıcı snapshot'ı ve veri router'ını aynı anda başlatır.
+    Toplam süre `timeout` ile sınırlı; router yetişmezse (None, None) döner.
+    """
+
+    def __init__(self, user_id, device_id, message, timeout=CONTEXT_DEADLINE):
+        self.started    = time.time()
+        self.deadline   = self.started + timeout
+        self.timeout    = timeout
+        self._cancelled = threading.Event()
+        self._snapshot  = _executor.submit(load_user_context, user_id, device_id)
+        self._route     = _executor.submit(self._run_route, message)
+
+    def _remaining(self):
+        return max(0.0, self.deadline - time.time())
+
+    def _run_route(self, message):
+        from services.router import route_query
+
+        # Konum sadece hava durumu için gerekli — uzun beklemeden router'ı başlat
+        wait([self._snapshot], timeout=min(LOCATION_WAIT, self._remaining()))
+        if self._cancelled.is_set():
+            return None, None
+        location = None
+        if self._snapshot.done() and not self._snapshot.exception():
+            snapshot = self._snapshot.result()
+            location = snapshot.location if snapshot else None
+        # Router'a bağlam deadline'ından kalan süre kadar izin ver
+        return route_query(message, location, timeout=self._remaining())
+
+    def user_context(self):
+        """Snapshot'ı bekler; hata veya süre aşımı çağırana yükseltilir."""
+        return self._snapshot.result(timeout=self._remaining())
+
+    def route(self):
+        try:
+            return self._route.result(timeout=self._remaining())
+        except TimeoutError:
+            print(f"⚠️ Context deadline ({self.timeout}s) aşıldı, router sonucu atlandı", flush=True)
+        except Exception as e:
+            print(f"⚠️ Context route error: {e}", flush=True)
+        finally:
+            print(f"⏱ Context toplandı: {time.time() - self.started:.3f}s", flush=True)
+        return None, None
+
+    def cancel(self):
+        self._cancelled.set()
+        self._route.cancel()
+
+
+def start_chat_context(user_id, device_id, message, timeout=CONTEXT_DEADLINE):
+    return ChatContextJob(user_id, device_id, message, timeout)
@@ -0,0 +1,150 @@
+# services/http_client.py
+"""
+Dış servis çağrıları için ortak HTTP istemcisi.
+
+Her host için keep-alive'lı bir requests.Session (HTTPAdapter havuzu) tutulur;
+aynı hosta giden çağrılar TCP+TLS el sıkışmasını tekrar etmez. İdempotent
+çağrılar (GET) bağlantı hatası ve 502/503/504'te jitter'lı backoff ile tekrar
+denenir — ama sadece hata hızlı geldiyse (HTTP_RETRY_BUDGET içinde), timeout'a
+düşmüş çağrı tekrar beklenmez. Host bazında gecikme/hata metrikleri tutulur.
+"""
+import time
+import random
+import threading
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from config import HTTP_POOL_SIZE, HTTP_MAX_HOSTS, HTTP_RETRIES, HTTP_RETRY_BUDGET, HTTP_BACKOFF
+from services.breaker import CircuitOpenError, get_breaker
+
+RETRY_STATUSES  = {502, 503, 504}
+RETRY_METHODS   = {'GET', 'HEAD', 'OPTIONS'}
+
+_lock     = threading.Lock()
+_sessions = OrderedDict()   # host -> Session (LRU; rastgele sayfa hostları havuzu şişirmesin)
+_metrics  = {}              # host -> sayaçlar
+
+
+def _session(host):
+    with _lock:
+        session = _sessions.get(host)
+        if session is not None:
+            _sessions.move_to_end(host)
+            return session
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _sessions[host] = session
+
+        # Eski session kapatılmaz — başka thread'de süren isteği kesmesin, GC toplar
+        while len(_sessions) > HTTP_MAX_HOSTS:
+            _sessions.popitem(last=False)
+    return session
+
+
+def _record(host, elapsed, error=False, retried=False):
+    with _lock:
+        if host not in _metrics and len(_metrics) >= HTTP_MAX_HOSTS:
+            host = 'other'   # sayfa içeriği için gidilen sayısız host tek satırda
+        m = _metrics.setdefault(host, {
+            'requests': 0, 'errors': 0, 'retries': 0,
+            'latency_ms_total': 0.0, 'latency_ms_max': 0.0,
+            'recent': deque(maxlen=200),
+        })
+        ms = elapsed * 1000
+        m['requests']         += 1
+        m['errors']           += int(error)
+        m['retries']          += int(retried)
+        m['latency_ms_total'] += ms
+        m['latency_ms_max']    = max(m['latency_ms_max'], ms)
+        m['recent'].append(ms)
+
+
+def request(method, url, retries=None, breaker=None, **kwargs):
+    """
+    requests.request ile aynı imza; yanıt ya da son hata döner/yükselir.
+    breaker: sağlayıcı adı — devre açıksa ağa çıkmadan CircuitOpenError yükselir.
+    """
+    if breaker is None:
+        return _send(method, url, retries, **kwargs)
+
+    circuit = get_breaker(breaker)
+    if not circuit.allow():
+        raise CircuitOpenError(breaker)
+    try:
+        resp = _send(method, url, retries, **kwargs)
+    except (requests.ConnectionError, requests.Timeout):
+        circuit.record_failure()
+        raise
+    if resp.status_code >= 500 or resp.status_code == 429:
+        circuit.record_failure()
+    else:
+        circuit.record_success()
+    return resp
+
+
+def _send(method, url, retries, **kwargs):
+    method  = method.upper()
+    host    = urlsplit(url).netloc
+    session = _session(host)
+    if retries is None:
+        retries = HTTP_RETRIES if method in RETRY_METHODS else 0
+
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        call_started = time.monotonic()
+        try:
+            resp = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _record(host, time.monotonic() - call_started, error=True, retried=attempt > 0)
+            # Okuma timeout'u zaten uzun sürdü — tekrar denemek gecikmeyi katlar
+            retryable = not isinstance(e, requests.ReadTimeout)
+            if not (retryable and _may_retry(attempt, retries, started)):
+                raise
+        else:
+            failed = resp.status_code >= 500 or resp.status_code == 429
+            _record(host, time.monotonic() - call_started, error=failed, retried=attempt > 0)
+            if resp.status_code not in RETRY_STATUSES or not _may_retry(attempt, retries, started):
+                return resp
+            resp.close()
+
+        attempt += 1
+        time.sleep(_backoff(attempt))
+
+
+def _backoff(attempt):
+    # Full jitter: [0, base * 2^(attempt-1)]
+    return random.uniform(0, HTTP_BACKOFF * (2 ** (attempt - 1)))
+
+
+def _may_retry(attempt, retries, started):
+    return attempt < retries and time.monotonic() - started < HTTP_RETRY_BUDGET
+
+
+def http_get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def http_post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def get_http_metrics():
+    with _lock:
+        hosts = {}
+        for host, m in _metrics.items():
+            recent = sorted(m['recent'])
+            n      = m['requests'] or 1
+            hosts[host] = {
+                'requests':       m['requests'],
+                'errors':         m['errors'],
+                'retries':        m['retries'],
+                'avg_latency_ms': round(m['latency_ms_total'] / n, 1),
+                'p95_latency_ms': round(recent[int(len(recent) * 0.95) - 1], 1) if len(recent) >= 20 else None,
+                'max_latency_ms': round(m['latency_ms_max'], 1),
+            }
+        return {'pooled_hosts': len(_sessions), 'hosts': hosts}
@@ -0,0 +1,141 @@
+# services/leader.py
+"""
+Zamanlanmış job'lar için tek çalıştırıcı seçimi.
+
+Her gunicorn worker'ı (ve her replica) kendi APScheduler'ını çalıştırır; aynı
+job'u hepsi aynı anda tetikler. İki mekanizma var:
+
+  - run_exclusive: Postgres advisory lock. Kilidi alan process job'u çalıştırır,
+    bitince scheduled_job_runs'a run_key ile kayıt düşer. Kilidi alamayanlar
+    LEADER_POLL_INTERVAL'de bir bakar: kayıt oluştuysa çıkar; kayıt yokken
+    kilit boşaldıysa (lider öldü — bağlantısı kapanınca kilit düşer) job'u
+    kendileri devralır.
+  - acquire_lease: Redis SET NX EX. Periyodik, kaçırılması sorun olmayan işler
+    (prefetch) için — süre boyunca tek process çalıştırır.
+"""
+import os
+import time
+import socket
+from config import LEADER_POLL_INTERVAL
+from database import get_db, release_db
+from services.cache import get_redis
+
+LEASE_KEY_PREFIX = 'dostai:lease:'
+WORKER_ID        = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _completed(cursor, run_key):
+    cursor.execute("SELECT 1 FROM scheduled_job_runs WHERE run_key = %s", (run_key,))
+    return cursor.fetchone() is not None
+
+
+def _try_lock(conn, lock_name):
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s)) AS locked", (lock_name,))
+    locked = cursor.fetchone()['locked']
+    cursor.close()
+    conn.commit()   # session kilidi; job süresince "idle in transaction" kalmasın
+    return locked
+
+
+def _unlock(conn, lock_name):
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", (lock_name,))
+    cursor.close()
+    conn.commit()
+
+
+def _mark_done(conn, lock_name, run_key, status):
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO scheduled_job_runs (run_key, lock_name, status, worker)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (run_key) DO NOTHING
+    """, (run_key, lock_name, status, WORKER_ID))
+    cursor.close()
+    conn.commit()
+
+
+def run_exclusive(lock_name, fn, run_key=None, failover=0):
+    """
+    fn'i aynı lock_name için tek process'te çalıştırır; çalıştırdıysa sonucunu,
+    çalıştırmadıysa None döner.
+
+    run_key verilirse tamamlanma kaydı tutulur: o run_key zaten bittiyse fn
+    çalışmaz, kilit başkasındaysa `failover` saniye boyunca liderin bitirmesi
+    beklenir, lider ölürse iş devralınır. run_key yoksa tek deneme yapılır.
+    """
+    deadline = time.monotonic() + failover
+    while True:
+        conn   = None
+        locked = False
+        try:
+            conn = get_db()
+            if run_key:
+                cursor = conn.cursor()
+                done   = _completed(cursor, run_key)
+                cursor.close()
+                conn.commit()
+                if done:
+                    return None
+
+            locked = _try_lock(conn, lock_name)
+            if locked:
+                if run_key:
+                    cursor = conn.cursor()
+                    done   = _completed(cursor, run_key)   # kilit beklenirken bitmiş olabilir
+                    cursor.close()
+                    conn.commit()
+                    if done:
+                        return None
+
+                print(f"👑 {lock_name} bu process'te çalışıyor ({WORKER_ID})", flush=True)
+                result = fn()
+                if run_key:
+                    status = result.get('status', 'done') if isinstance(result, dict) else 'done'
+                    _mark_done(conn, lock_name, run_key, status)
+                return result
+        except Exception as e:
+            print(f"❌ run_exclusive error ({lock_name}): {e}", flush=True)
+            if locked:
+                raise
+        finally:
+            _release(conn, lock_name, locked)
+
+        if time.monotonic() >= deadline:
+            print(f"⏭️ {lock_name} başka bir process'te çalışıyor, atlandı", flush=True)
+            return None
+        time.sleep(LEADER_POLL_INTERVAL)
+
+
+def _release(conn, lock_name, locked):
+    # Havuza kilidi tutan bağlantı geri verilmemeli — kilit bırakılamazsa bağlantı kapatılır
+    if conn is None:
+        return
+    close = False
+    if locked:
+        try:
+            _unlock(conn, lock_name)
+        except Exception as e:
+            print(f"⚠️ Advisory unlock error ({lock_name}): {e}", flush=True)
+            close = True
+    else:
+        try:
+            conn.rollback()
+        except Exception:
+            close = True
+    release_db(conn, close=close)
+
+
+def acquire_lease(name, ttl):
+    """
+    Redis paylaşılıyorsa `ttl` saniyelik lease'i almayı dener; alan process işi
+    yapar. Redis yoksa her process kendi işini yapar (True).
+    """
+    r = get_redis()
+    if r is None:
+        return True
+    try:
+        return bool(r.set(f"{LEASE_KEY_PREFIX}{name}", WORKER_ID, nx=True, ex=max(1, int(ttl))))
+    except Exception:
+        return True
@@ -1,10 +1,18 @@
 # services/learning.py
 import json
+import time
 import threading
 import traceback as tb
+from collections import OrderedDict
 from datetime import datetime
-from config import TURKEY_TZ, MODEL_EXTRACTION
+from config import (
+    TURKEY_TZ, MODEL_EXTRACTION,
+    EXTRACTION_WORKERS, EXTRACTION_QUEUE_SIZE, EXTRACTION_MAX_COALESCED,
+    EXTRACTION_BATCH_SIZE, EXTRACTION_BATCH_WAIT_MS,
+)
+from psycopg2.extras import execute_values
 from database import get_db, release_db
+from services.ai_service import ai_call
 
 # ── Yardımcı fonksiyonlar ─────────────────────────────────────────────────────
 
@@ -224,121 +232,489 @@ Onemli:
 - Hicbir somut bilgi yoksa learnings bos liste olsun
 """
 
+BATCH_EXTRACTION_PROMPT = """Asagida FARKLI kullanicilara ait numaralandirilmis Turkce mesajlar var.
+Her mesaji DIGERLERINDEN BAGIMSIZ analiz et; bir mesajdaki bilgiyi baska mesaja tasima.
 
-def _do_extract_learnings(user_id, user_message, ai_response, client):
-    print(f"🔍 extract_learnings START: user_id={user_id}, msg='{user_message[:40]}'", flush=True)
+Mesajlar (JSON):
+{items}
+
+Her mesaj icin:
+GOREV 1 - Kisisel bilgileri bul (ACIK veya DOLAYLI; gecici semptomlar, gundelik deneyimler, ruh hali dahil).
+GOREV 2 - Daha onceki bir bilgiyle ACIKCA celisebilecek ifadeleri contradictions listesine ekle.
+GOREV 3 - Duygusal tonu ve yogunlugunu belirle.
+
+Yanit formati (SADECE JSON, her mesaj icin "id" ayni kalacak):
+{{
+  "results": [
+    {{
+      "id": 1,
+      "learnings": [
+        {{
+          "category": "health",
+          "value": "cildinde kucuk benekler var",
+          "context": "Cildinde kucuk kucuk benekler oldugunu soyledi",
+          "confidence": 0.85,
+          "importance": 0.75,
+          "frequency_hint": 1
+        }}
+      ],
+      "contradictions": [],
+      "emotion": {{
+        "detected": "neutral",
+        "intensity": 0.5,
+        "context": ""
+      }}
+    }}
+  ]
+}}
+
+Kategoriler: health, sports, music, food, hobbies, work, education, location,
+family, technology, personality, movies, life_events, relationships, finance
+
+Onemli:
+- confidence: ne kadar kesin (0.5-1.0)
+- importance: saglik/aile/is yuksek (0.7-0.9), hobiler orta (0.4-0.6)
+- emotion.detected: neutral / happy / sad / angry / confused
+- Hicbir somut bilgi yoksa learnings bos liste olsun
+- Her id icin mutlaka bir sonuc yaz
+"""
+
+
+def _get_device_ids(user_ids):
     conn = None
     try:
         conn = get_db()
         cursor = conn.cursor()
-        cursor.execute("SELECT device_id FROM users WHERE id = %s", (str(user_id),))
-        row = cursor.fetchone()
-        if not row:
-            cursor.close()
-            return
-        device_id = row['device_id']
+        cursor.execute(
+            "SELECT id, device_id FROM users WHERE id IN %s",
+            (tuple(str(uid) for uid in user_ids),)
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+        return {str(r['id']): r['device_id'] for r in rows if r['device_id']}
+    finally:
+        release_db(conn)
 
-        if not client or len(user_message.strip()) < 5:
-            cursor.close()
-            return
 
-        resp = client.chat.completions.create(
-            model=MODEL_EXTRACTION,
-            messages=[{"role": "user", "content": EXTRACTION_PROMPT.format(msg=user_message)}],
-            max_tokens=500,
-            temperature=0.1,
-        )
-        raw = resp.choices[0].message.content.strip()
-        if '```' in raw:
-            raw = raw[raw.find('{'):raw.rfind('}') + 1]
-
-        parsed        = json.loads(raw)
-        gpt_facts     = parsed.get("learnings", [])
-        contradictions = parsed.get("contradictions", [])
-        emotion_data  = parsed.get("emotion", {})
-        print(f"🧠 Extraction result: {len(gpt_facts)} facts", flush=True)
-
-        # Yeni fact'leri kaydet
-        for fact in gpt_facts:
-            if not fact.get('value') or not fact.get('category'):
-                continue
-            try:
-                cursor.execute("""
-                    INSERT INTO user_facts
-                        (device_id, category, fact_key, fact_value, confidence,
-                         source, importance, frequency, last_mentioned)
-                    VALUES (%s, %s, %s, %s, %s, 'gpt_extraction', %s, %s, CURRENT_DATE)
-                    ON CONFLICT (device_id, category, fact_key)
-                    DO UPDATE SET
-                        fact_value     = EXCLUDED.fact_value,
-                        confidence     = LEAST(user_facts.confidence + 0.1, 1.0),
-                        importance     = GREATEST(user_facts.importance, EXCLUDED.importance),
-                        frequency      = user_facts.frequency + EXCLUDED.frequency,
-                        last_mentioned = CURRENT_DATE,
-                        updated_at     = CURRENT_TIMESTAMP
-                """, (
-                    device_id,
-                    fact['category'],
-                    fact['value'],
-                    fact.get('context', ''),
-                    float(fact.get('confidence', 0.7)),
-                    float(fact.get('importance', 0.5)),
-                    int(fact.get('frequency_hint', 1)),
-                ))
-                print(f"  → {fact.get('category')}: {fact.get('value')}", flush=True)
-            except Exception as ex:
-                print(f"fact insert error: {ex}", flush=True)
-
-        # Çelişkileri işle
-        for contradiction in contradictions:
-            cat = contradiction.get('category')
-            val = contradiction.get('value')
-            if not cat or not val:
-                continue
-            try:
-                cursor.execute("""
-                    UPDATE user_facts
-                    SET confidence = confidence - 0.3, updated_at = CURRENT_TIMESTAMP
-                    WHERE device_id = %s AND category = %s AND fact_key != %s
-                """, (device_id, cat, val))
-                cursor.execute("""
-                    DELETE FROM user_facts
-                    WHERE device_id = %s AND category = %s AND confidence < 0.2
-                """, (device_id, cat))
-            except Exception as ex:
-                print(f"contradiction update error: {ex}", flush=True)
-
-        # Duygu kaydet
-        detected  = emotion_data.get('detected', 'neutral')
-        intensity = float(emotion_data.get('intensity', 0.5))
-        ctx       = emotion_data.get('context', '')
-        if detected and detected != 'neutral':
-            try:
-                cursor.execute("""
-                    INSERT INTO user_emotion_history (device_id, emotion, intensity, context)
-                    VALUES (%s, %s, %s, %s)
-                """, (device_id, detected, intensity, ctx))
-            except Exception as ex:
-                print(f"emotion save error: {ex}", flush=True)
+def _get_device_id(user_id):
+    return _get_device_ids([user_id]).get(str(user_id))
+
+
+def _parse_extraction(raw):
+    raw = raw.strip()
+    if '```' in raw:
+        raw = raw[raw.find('{'):raw.rfind('}') + 1]
+    return json.loads(raw)
+
+
+# ── Toplu fact birleştirme ────────────────────────────────────────────────────
+# Bir analiz sonucunun tamamı (fact'ler, çelişkiler, duygu, kişilik) birkaç
+# çok satırlı statement ile uygulanır. merge modları:
+#   reinforce — GPT extraction: güven +0.1, önem max, frekans toplanır
+#   average   — kural tabanlı ilgi alanları: güven ortalaması
+#   replace   — konum gibi tekil bilgiler: güven üzerine yazılır
+
+_FACT_MERGE_SQL = {
+    'reinforce': ("""
+        INSERT INTO user_facts
+            (device_id, category, fact_key, fact_value, confidence,
+             source, importance, frequency, last_mentioned)
+        VALUES %s
+        ON CONFLICT (device_id, category, fact_key)
+        DO UPDATE SET
+            fact_value     = EXCLUDED.fact_value,
+            confidence     = LEAST(user_facts.confidence + 0.1, 1.0),
+            importance     = GREATEST(user_facts.importance, EXCLUDED.importance),
+            frequency      = user_facts.frequency + EXCLUDED.frequency,
+            last_mentioned = CURRENT_DATE,
+            updated_at     = CURRENT_TIMESTAMP
+    """, "(%s, %s, %s, %s, %s, %s, %s, %s, CURRENT_DATE)"),
+    'average': ("""
+        INSERT INTO user_facts (device_id, category, fact_key, confidence, source)
+        VALUES %s
+        ON CONFLICT (device_id, category, fact_key)
+        DO UPDATE SET
+            confidence = (user_facts.confidence + EXCLUDED.confidence) / 2,
+            updated_at = CURRENT_TIMESTAMP
+    """, "(%s, %s, %s, %s, %s)"),
+    'replace': ("""
+        INSERT INTO user_facts (device_id, category, fact_key, confidence, source)
+        VALUES %s
+        ON CONFLICT (device_id, category, fact_key)
+        DO UPDATE SET
+            confidence = EXCLUDED.confidence,
+            updated_at = CURRENT_TIMESTAMP
+    """, "(%s, %s, %s, %s, %s)"),
+}
+
+
+def _fact_rows(device_id, facts, mode):
+    """Aynı (category, key) bir statement'ta iki kez olamaz — önce Python'da birleştir."""
+    merged = OrderedDict()
+    for fact in facts:
+        key = (fact['category'], fact['key'])
+        prev = merged.get(key)
+        if prev and mode == 'reinforce':
+            fact = dict(fact,
+                        importance=max(prev['importance'], fact['importance']),
+                        frequency=prev['frequency'] + fact['frequency'])
+        merged[key] = fact
+
+    if mode == 'reinforce':
+        return [
+            (device_id, f['category'], f['key'], f.get('value', ''), f['confidence'],
+             f.get('source', 'gpt_extraction'), f['importance'], f['frequency'])
+            for f in merged.values()
+        ]
+    return [
+        (device_id, f['category'], f['key'], f['confidence'], f.get('source', 'conversation'))
+        for f in merged.values()
+    ]
+
+
+def merge_facts(cursor, device_id, facts=(), contradictions=(), emotion=None, traits=()):
+    """
+    Analiz sonucunu toplu uygular (commit çağırana aittir).
+      facts:          [{'category', 'key', 'confidence', 'merge', ...}]
+      contradictions: [(category, value)] — aynı kategorideki diğer fact'lerin güveni düşer
+      emotion:        (emotion, intensity, context) veya None
+      traits:         [{'trait', 'score', 'evidence_count'}]
+    """
+    by_mode = {}
+    for fact in facts:
+        by_mode.setdefault(fact.get('merge', 'reinforce'), []).append(fact)
+    for mode, mode_facts in by_mode.items():
+        sql, template = _FACT_MERGE_SQL[mode]
+        execute_values(cursor, sql, _fact_rows(device_id, mode_facts, mode), template=template)
+
+    if contradictions:
+        categories = [c for c, _ in contradictions]
+        values     = [v for _, v in contradictions]
+        # Her çelişki, kategorideki farklı her fact'ten 0.3 düşer (eski tek tek UPDATE ile aynı)
+        cursor.execute("""
+            UPDATE user_facts uf
+            SET confidence = uf.confidence - 0.3 * hits.n,
+                updated_at = CURRENT_TIMESTAMP
+            FROM (
+                SELECT f.category, f.fact_key, COUNT(*) AS n
+                FROM user_facts f
+                JOIN unnest(%(categories)s::text[], %(values)s::text[]) AS c(category, fact_key)
+                  ON c.category = f.category AND c.fact_key <> f.fact_key
+                WHERE f.device_id = %(device_id)s
+                GROUP BY f.category, f.fact_key
+            ) hits
+            WHERE uf.device_id = %(device_id)s
+              AND uf.category  = hits.category
+              AND uf.fact_key  = hits.fact_key
+        """, {'device_id': device_id, 'categories': categories, 'values': values})
+        cursor.execute("""
+            DELETE FROM user_facts
+            WHERE device_id = %s AND category = ANY(%s::text[]) AND confidence < 0.2
+        """, (device_id, list(set(categories))))
 
+    if emotion:
+        cursor.execute("""
+            INSERT INTO user_emotion_history (device_id, emotion, intensity, context)
+            VALUES (%s, %s, %s, %s)
+        """, (device_id, *emotion))
+
+    if traits:
+        merged_traits = OrderedDict((t['trait'], t) for t in traits)
+        execute_values(cursor, """
+            INSERT INTO personality_traits (device_id, trait, score, evidence_count)
+            VALUES %s
+            ON CONFLICT (device_id, trait)
+            DO UPDATE SET
+                score = (personality_traits.score + EXCLUDED.score) / 2,
+                evidence_count = personality_traits.evidence_count + 1,
+                updated_at = CURRENT_TIMESTAMP
+        """, [(device_id, t['trait'], t['score'], t['evidence_count']) for t in merged_traits.values()])
+
+
+def merge_analysis(cursor, device_id, analysis):
+    """LearningEngine.analyze_message sonucunu (ilgi alanı, konum, kişilik) toplu kaydeder."""
+    facts = [
+        {'category': i['category'], 'key': i['fact_key'], 'confidence': i['confidence'],
+         'source': i['source'], 'merge': 'average'}
+        for i in analysis.get('interests', [])
+    ]
+    loc = analysis.get('location')
+    if loc:
+        facts.append({'category': loc['category'], 'key': loc['fact_key'], 'confidence': loc['confidence'],
+                      'source': loc['source'], 'merge': 'replace'})
+    merge_facts(cursor, device_id, facts=facts, traits=analysis.get('personality', []))
+
+
+def _save_extraction(device_id, parsed):
+    """GPT extraction JSON'unu (learnings/contradictions/emotion) tek transaction'da uygular."""
+    facts = [
+        {
+            'category':   fact['category'],
+            'key':        fact['value'],
+            'value':      fact.get('context', ''),
+            'confidence': float(fact.get('confidence', 0.7)),
+            'importance': float(fact.get('importance', 0.5)),
+            'frequency':  int(fact.get('frequency_hint', 1)),
+            'source':     'gpt_extraction',
+            'merge':      'reinforce',
+        }
+        for fact in parsed.get("learnings", [])
+        if fact.get('value') and fact.get('category')
+    ]
+    contradictions = [
+        (c['category'], c['value'])
+        for c in parsed.get("contradictions", [])
+        if c.get('category') and c.get('value')
+    ]
+    emotion_data = parsed.get("emotion") or {}
+    detected     = emotion_data.get('detected', 'neutral')
+    emotion      = None
+    if detected and detected != 'neutral':
+        emotion = (detected, float(emotion_data.get('intensity', 0.5)), emotion_data.get('context', ''))
+    print(f"🧠 Extraction result: {len(facts)} facts", flush=True)
+
+    conn = None
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        merge_facts(cursor, device_id, facts=facts, contradictions=contradictions, emotion=emotion)
         conn.commit()
         cursor.close()
-
-    except Exception as e:
-        print(f"_do_extract_learnings error: {e}", flush=True)
-        print(tb.format_exc(), flush=True)
+        for fact in facts:
+            print(f"  → {fact['category']}: {fact['key']}", flush=True)
+    except Exception:
         if conn:
             try: conn.rollback()
             except: pass
+        raise
     finally:
         release_db(conn)
 
 
-def extract_learnings(user_id, user_message, ai_response, client):
-    """Async — chat endpoint'ini bloke etmez."""
-    t = threading.Thread(
-        target=_do_extract_learnings,
-        args=(user_id, user_message, ai_response, client),
-        daemon=True,
+def _extract_single(device_id, user_message, client):
+    resp = ai_call(
+        'extraction', client.chat.completions.create,
+        model=MODEL_EXTRACTION,
+        messages=[{"role": "user", "content": EXTRACTION_PROMPT.format(msg=user_message)}],
+        max_tokens=500,
+        temperature=0.1,
     )
-    t.start()
+    _record_extraction_tokens(resp)
+    _save_extraction(device_id, _parse_extraction(resp.choices[0].message.content))
+
+
+def _do_extract_learnings(user_id, user_message, ai_response, client):
+    """Tek kullanıcı için extraction. DB bağlantısı OpenAI çağrısı sırasında tutulmaz."""
+    print(f"🔍 extract_learnings START: user_id={user_id}, msg='{user_message[:40]}'", flush=True)
+    try:
+        if not client or len(user_message.strip()) < 5:
+            return False
+        device_id = _get_device_id(user_id)
+        if not device_id:
+            return False
+        _extract_single(device_id, user_message, client)
+        return True
+
+    except Exception as e:
+        print(f"_do_extract_learnings error: {e}", flush=True)
+        print(tb.format_exc(), flush=True)
+        return False
+
+
+def _do_extract_batch(items, client):
+    """
+    items: [(user_id, mesaj)] — farklı kullanıcılar. Tek GPT isteğiyle analiz edilir,
+    sonuçlar kullanıcılara dağıtılır. Batch yanıtında eksik kalan mesajlar tek tek
+    işlenir. {user_id: başarılı mı} döner.
+    """
+    if len(items) == 1:
+        user_id, message = items[0]
+        return {user_id: _do_extract_learnings(user_id, message, None, client)}
+
+    print(f"🔍 extract_learnings BATCH START: {len(items)} kullanıcı", flush=True)
+    results = {user_id: False for user_id, _ in items}
+    try:
+        device_ids = _get_device_ids([user_id for user_id, _ in items])
+    except Exception as e:
+        print(f"_do_extract_batch device lookup error: {e}", flush=True)
+        return results
+
+    batch = [
+        (idx, user_id, device_ids[str(user_id)], message)
+        for idx, (user_id, message) in enumerate(items, start=1)
+        if str(user_id) in device_ids
+    ]
+    if not batch:
+        return results
+
+    parsed_by_id = {}
+    try:
+        payload = json.dumps(
+            [{'id': idx, 'mesaj': message} for idx, _, _, message in batch],
+            ensure_ascii=False, indent=1,
+        )
+        resp = ai_call(
+            'extraction', client.chat.completions.create,
+            model=MODEL_EXTRACTION,
+            messages=[{"role": "user", "content": BATCH_EXTRACTION_PROMPT.format(items=payload)}],
+            max_tokens=min(400 * len(batch), 4000),
+            temperature=0.1,
+            response_format={"type": "json_object"},
+        )
+        _record_extraction_tokens(resp)
+        for item in _parse_extraction(resp.choices[0].message.content).get('results', []):
+            try:
+                parsed_by_id[int(item.get('id'))] = item
+            except (TypeError, ValueError):
+                continue
+    except Exception as e:
+        print(f"_do_extract_batch error, tek tek işlenecek: {e}", flush=True)
+
+    for idx, user_id, device_id, message in batch:
+        try:
+            if idx in parsed_by_id:
+                _save_extraction(device_id, parsed_by_id[idx])
+            else:
+                _extract_single(device_id, message, client)
+            results[user_id] = True
+        except Exception as e:
+            print(f"_do_extract_batch item error (user_id={user_id}): {e}", flush=True)
+    return results
+
+
+# ── Extraction kuyruğu ────────────────────────────────────────────────────────
+# Sabit sayıda worker; kullanıcı başına tek kuyruk girişi (bekleyen mesajlar
+# birleştirilir), kuyruk dolunca en eski giriş atılır.
+
+_extract_cond    = threading.Condition()
+_extract_pending = OrderedDict()   # user_id -> {'messages', 'client', 'enqueued_at'}
+_extract_workers = []
+_extract_stats   = {
+    'enqueued': 0, 'coalesced': 0, 'dropped': 0,
+    'processed': 0, 'failed': 0,
+    'wait_ms_total': 0.0, 'wait_ms_max': 0.0,
+    'run_ms_total': 0.0, 'run_ms_max': 0.0,
+    'requests': 0, 'tokens': 0,
+    'workers_started': 0,
+}
+
+
+def _record_extraction_tokens(resp):
+    usage = getattr(resp, 'usage', None)
+    with _extract_cond:
+        _extract_stats['requests'] += 1
+        _extract_stats['tokens']   += usage.total_tokens if usage else 0
+
+
+def _take_extraction_batch():
+    """İlk giriş gelince EXTRACTION_BATCH_WAIT_MS kadar daha toplar, en fazla BATCH_SIZE döner."""
+    with _extract_cond:
+        while not _extract_pending:
+            _extract_cond.wait()
+        deadline = time.monotonic() + EXTRACTION_BATCH_WAIT_MS / 1000
+        while len(_extract_pending) < EXTRACTION_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _extract_cond.wait(remaining)
+        count = min(EXTRACTION_BATCH_SIZE, len(_extract_pending))
+        return [_extract_pending.popitem(last=False) for _ in range(count)]
+
+
+def _extraction_worker():
+    while True:
+        try:
+            _run_extraction_batch()
+        except Exception as e:
+            # Tek batch'in hatası worker'ı öldürmesin
+            print(f"_extraction_worker error: {e}", flush=True)
+            tb.print_exc()
+
+
+def _run_extraction_batch():
+    entries = _take_extraction_batch()
+    if not entries:
+        return
+
+    started = time.monotonic()
+    try:
+        results = _do_extract_batch(
+            [(user_id, '\n'.join(entry['messages'])) for user_id, entry in entries],
+            entries[0][1]['client'],
+        )
+    except Exception as e:
+        print(f"_do_extract_batch error: {e}", flush=True)
+        results = {}
+    finished = time.monotonic()
+
+    run_ms = (finished - started) * 1000
+    with _extract_cond:
+        for user_id, entry in entries:
+            wait_ms = (started - entry['enqueued_at']) * 1000
+            _extract_stats['processed' if results.get(user_id) else 'failed'] += 1
+            _extract_stats['wait_ms_total'] += wait_ms
+            _extract_stats['wait_ms_max']    = max(_extract_stats['wait_ms_max'], wait_ms)
+        _extract_stats['run_ms_total'] += run_ms * len(entries)
+        _extract_stats['run_ms_max']    = max(_extract_stats['run_ms_max'], run_ms)
+
+
+def _ensure_extraction_workers():
+    with _extract_cond:
+        # Ölmüş thread'ler ayıklanıp yerine yenisi başlatılır
+        _extract_workers[:] = [t for t in _extract_workers if t.is_alive()]
+        while len(_extract_workers) < EXTRACTION_WORKERS:
+            _extract_stats['workers_started'] += 1
+            t = threading.Thread(
+                target=_extraction_worker,
+                name=f"extraction-{_extract_stats['workers_started']}",
+                daemon=True,
+            )
+            t.start()
+            _extract_workers.append(t)
+
+
+def extract_learnings(user_id, user_message, ai_response, client):
+    """Async — chat endpoint'ini bloke etmez, sadece kuyruğa alır."""
+    if not client or len(user_message.strip()) < 5:
+        return
+    _ensure_extraction_workers()
+    with _extract_cond:
+        _extract_stats['enqueued'] += 1
+        entry = _extract_pending.get(user_id)
+        if entry:
+            entry['messages'] = (entry['messages'] + [user_message])[-EXTRACTION_MAX_COALESCED:]
+            _extract_stats['coalesced'] += 1
+            return
+        if len(_extract_pending) >= EXTRACTION_QUEUE_SIZE:
+            dropped_user, _ = _extract_pending.popitem(last=False)
+            _extract_stats['dropped'] += 1
+            print(f"⚠️ Extraction kuyruğu dolu, atıldı: user_id={dropped_user}", flush=True)
+        _extract_pending[user_id] = {
+            'messages':    [user_message],
+            'client':      client,
+            'enqueued_at': time.monotonic(),
+        }
+        _extract_cond.notify()
+
+
+def get_extraction_stats():
+    with _extract_cond:
+        done = (_extract_stats['processed'] + _extract_stats['failed']) or 1
+        return {
+            'queue_depth':  len(_extract_pending),
+            'workers':      sum(1 for t in _extract_workers if t.is_alive()),
+            'workers_started': _extract_stats['workers_started'],
+            'enqueued':     _extract_stats['enqueued'],
+            'coalesced':    _extract_stats['coalesced'],
+            'dropped':      _extract_stats['dropped'],
+            'processed':    _extract_stats['processed'],
+            'failed':       _extract_stats['failed'],
+            'wait_ms_avg':  round(_extract_stats['wait_ms_total'] / done, 1),
+            'wait_ms_max':  round(_extract_stats['wait_ms_max'], 1),
+            'run_ms_avg':   round(_extract_stats['run_ms_total'] / done, 1),
+            'run_ms_max':   round(_extract_stats['run_ms_max'], 1),
+            'requests':     _extract_stats['requests'],
+            'tokens':       _extract_stats['tokens'],
+            'messages_per_request': round(done / (_extract_stats['requests'] or 1), 2),
+            'tokens_per_message':   round(_extract_stats['tokens'] / done, 1),
+        }
@@ -0,0 +1,104 @@
+# services/matcher.py
+"""
+Çok kalıplı tetikleyici eşleştirici (Aho–Corasick).
+
+Bütün kelime grupları import sırasında tek bir otomata derlenir; mesaj tek
+geçişte taranır ve her grup için eşleşen terimler döner. İki eşleşme türü var:
+  - substring grupları: `term in text` ile aynı anlam; terimler grubun liste
+    sırasıyla döner (örn. ilk bulunan şehir = TR_CITIES'te ilk geçen)
+  - token grupları: terimin iki yanında [a-zA-Z0-9] olmamalı
+    (re.findall(r'[a-zA-Z0-9]+') ile kelime eşleşmesiyle aynı); terimler
+    mesajdaki ilk geçiş sırasıyla döner
+"""
+from collections import deque
+
+
+def _is_token_char(ch):
+    return ch.isascii() and ch.isalnum()
+
+
+class TriggerMatcher:
+    def __init__(self, groups, token_groups=None):
+        """
+        groups:       {grup_adı: [terim, ...]}   — substring eşleşme
+        token_groups: {grup_adı: [terim, ...]}   — kelime sınırlı eşleşme
+        """
+        self._plain = {}   # terim -> [(grup, liste sırası)]
+        self._token = {}   # terim -> [grup]
+        for group, terms in groups.items():
+            for idx, term in enumerate(terms):
+                entries = self._plain.setdefault(term, [])
+                if all(g != group for g, _ in entries):   # listede tekrar eden terim → ilk sıra
+                    entries.append((group, idx))
+        for group, terms in (token_groups or {}).items():
+            for term in terms:
+                entries = self._token.setdefault(term, [])
+                if group not in entries:
+                    entries.append(group)
+
+        self._build(set(self._plain) | set(self._token))
+
+    def _build(self, terms):
+        goto = [{}]
+        out  = [()]
+        for term in terms:
+            state = 0
+            for ch in term:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    goto.append({})
+                    out.append(())
+                    nxt = goto[state][ch] = len(goto) - 1
+                state = nxt
+            out[state] += (term,)
+
+        # Failure link'ler BFS ile; ardından tam geçiş tablosu (DFA) — tarama
+        # sırasında fail zinciri yürünmez, her karakter tek dict lookup
+        fail  = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+                out[nxt] += out[fail[nxt]]
+                queue.append(nxt)
+
+        self._delta     = delta
+        self._plain_out = [tuple(t for t in terms if t in self._plain) for terms in out]
+        self._token_out = [tuple(t for t in terms if t in self._token) for terms in out]
+
+    def scan(self, text):
+        """{grup: (terim, ...)} — eşleşmeyen gruplar sonuçta yer almaz."""
+        delta = self._delta
+        plain_out, token_out = self._plain_out, self._token_out
+        plain_seen = set()
+        token_seen = {}   # terim -> ilk geçerli başlangıç pozisyonu
+
+        state = 0
+        for pos, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if plain_out[state]:
+                plain_seen.update(plain_out[state])
+            for term in token_out[state]:
+                if term in token_seen:
+                    continue
+                start = pos - len(term) + 1
+                before_ok = start == 0 or not _is_token_char(text[start - 1])
+                after_ok  = pos + 1 == len(text) or not _is_token_char(text[pos + 1])
+                if before_ok and after_ok:
+                    token_seen[term] = start
+
+        plain, token = self._plain, self._token
+
+        found = {}
+        for term in plain_seen:
+            for group, idx in plain[term]:
+                found.setdefault(group, []).append((idx, term))
+        for term, start in token_seen.items():
+            for group in token[term]:
+                found.setdefault(group, []).append((start, term))
+        return {group: tuple(term for _, term in sorted(hits)) for group, hits in found.items()}
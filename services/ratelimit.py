@@ -0,0 +1,51 @@
+# services/ratelimit.py
+"""
+Token bucket — saniyede `rate` istek, en fazla `burst` birikmiş hak.
+
+Toplu işlerde (bildirim job'u) dış servislere giden çağrı hızını sınırlar;
+acquire() hak yoksa bir sonraki hak birikene kadar bekler. Process içidir,
+worker'lar arasında paylaşılmaz.
+"""
+import time
+import threading
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        self.rate   = float(rate)
+        self.burst  = float(burst or rate)
+        self._lock  = threading.Lock()
+        self._tokens  = self.burst
+        self._updated = time.monotonic()
+        self._waited  = 0.0
+
+    def _refill(self, now):
+        self._tokens  = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        `tokens` hak alır (toplu gönderimde mesaj sayısı; burst'e kırpılır);
+        timeout dolarsa False döner. Beklenen süre istatistiğe yazılır.
+        """
+        tokens   = min(float(tokens), self.burst)
+        started  = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self._waited += now - started
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                if now + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+    def waited(self):
+        """Bu bucket'ta toplam beklenen süre (sn)."""
+        with self._lock:
+            return self._waited
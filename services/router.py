@@ -1,14 +1,25 @@
 # services/router.py
 import re
-import requests as req_lib
+import time
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, wait
 from config import (
     API_FOOTBALL_KEY, OPENWEATHER_KEY, EXCHANGERATE_KEY,
-    TURKISH_LEAGUE_ID, TR_TEAM_KEYWORDS, EURO_TEAM_KEYWORDS
+    TURKISH_LEAGUE_ID, TR_TEAM_KEYWORDS, EURO_TEAM_KEYWORDS, CACHE_TTL,
+    SPORTS_WORKERS, SPORTS_DEADLINE, ROUTE_DEADLINE, SEARCH_TIMEOUT,
+    PREFETCH_WEATHER_CITIES,
 )
+from services.cache import cached, refresh_cached
+from services.matcher import TriggerMatcher
 from services.search import web_search
+from services.teams import resolve_team, fuzzy_team_keywords
+from services.http_client import http_get
+from services.text import fold
 
 ALL_TEAM_KEYWORDS = TR_TEAM_KEYWORDS + EURO_TEAM_KEYWORDS
 
+_sports_pool = ThreadPoolExecutor(max_workers=SPORTS_WORKERS, thread_name_prefix='sports')
+
 # ── Spor ──────────────────────────────────────────────────────────────────────
 
 SPORT_TRIGGERS = [
@@ -44,8 +55,9 @@ RECENCY_TRIGGERS = [
 ]
 
 
-def needs_recency(message_lower):
-    return any(t in message_lower for t in RECENCY_TRIGGERS)
+def needs_recency(message_lower, signals=None):
+    signals = signals or scan_message(message_lower)
+    return signals.has('recency')
 
 
 # ── Soru kalıpları ────────────────────────────────────────────────────────────
@@ -60,10 +72,11 @@ QUESTION_PATTERNS = [
     r'(hakkında|ile ilgili|konusunda)',
 ]
 
+QUESTION_RE = re.compile('|'.join(f'(?:{p})' for p in QUESTION_PATTERNS))
+
 
 def is_question(message):
-    msg_lower = message.lower()
-    return any(re.search(p, msg_lower) for p in QUESTION_PATTERNS)
+    return QUESTION_RE.search(message.lower()) is not None
 
 
 # ── Web search gerektiren konular ─────────────────────────────────────────────
@@ -129,24 +142,26 @@ WEB_SEARCH_TRIGGERS = [
 ]
 
 
-def needs_web_search(message):
-    msg_lower = message.lower()
+# Genel bilgi talepleri — kelime listesine gerek kalmadan
+INFO_TRIGGERS = [
+    'hakkında', 'hakkinda', 'bilgi', 'anlat', 'açıkla', 'acikla',
+    'nedir', 'kimdir', 'listesi', 'liste', 'sırala', 'sirala',
+    'kaçtır', 'kactir', 'hangisi', 'nasıl', 'nasil',
+]
+
+
+def needs_web_search(message, signals=None):
+    signals = signals or scan_message(message.lower())
 
     # Kesin web search triggerları
-    if any(k in msg_lower for k in WEB_SEARCH_TRIGGERS):
+    if signals.has('web_search'):
         return True
 
-    # Genel bilgi talepleri — kelime listesine gerek kalmadan
-    info_triggers = [
-        'hakkında', 'hakkinda', 'bilgi', 'anlat', 'açıkla', 'acikla',
-        'nedir', 'kimdir', 'listesi', 'liste', 'sırala', 'sirala',
-        'kaçtır', 'kactir', 'hangisi', 'nasıl', 'nasil',
-    ]
-    if any(k in msg_lower for k in info_triggers):
+    if signals.has('info'):
         return True
 
     # Soru cümlesi + 3 kelimeden uzunsa → her zaman dene
-    if is_question(message) and len(message.split()) >= 3:
+    if signals.question and len(message.split()) >= 3:
         return True
 
     return False
@@ -154,22 +169,72 @@ def needs_web_search(message):
 
 # ── Spor fonksiyonları ────────────────────────────────────────────────────────
 
-def _get_team_id(team_name, headers):
-    try:
-        resp = req_lib.get(
-            'https://v3.football.api-sports.io/teams',
+LIVE_STATUSES     = {'1H', 'HT', '2H', 'ET', 'BT', 'P', 'SUSP', 'INT', 'LIVE'}
+FINISHED_STATUSES = {'FT', 'AET', 'PEN', 'PST', 'CANC', 'ABD', 'AWD', 'WO'}
+
+
+def _fixtures_ttl(fixtures):
+    """Canlı maç varsa kısa, ileri tarihli maç varsa ilk maça kadar, hepsi bittiyse uzun."""
+    statuses = [f['fixture']['status']['short'] for f in fixtures]
+    if any(s in LIVE_STATUSES for s in statuses):
+        return CACHE_TTL['fixtures_live']
+    kickoffs = [
+        f['fixture']['timestamp'] for f in fixtures
+        if f['fixture']['status']['short'] not in FINISHED_STATUSES and f['fixture'].get('timestamp')
+    ]
+    if kickoffs:
+        until_kickoff = min(kickoffs) - time.time()
+        return max(CACHE_TTL['fixtures_live'], min(CACHE_TTL['fixtures_upcoming'], until_kickoff))
+    if not fixtures:
+        return CACHE_TTL['fixtures_upcoming']
+    return CACHE_TTL['fixtures_results']
+
+
+def _football_headers():
+    return {
+        'x-rapidapi-host': 'v3.football.api-sports.io',
+        'x-rapidapi-key': API_FOOTBALL_KEY,
+    }
+
+
+def _fetch_fixtures(headers, refresh=False, **params):
+    """API-Football /fixtures — parametre setine göre cache'lenir, hata → None."""
+    params['timezone'] = 'Europe/Istanbul'
+
+    def load():
+        resp = http_get(
+            'https://v3.football.api-sports.io/fixtures',
             headers=headers,
-            params={'search': team_name},
-            timeout=5
+            params=params,
+            timeout=5,
+            breaker='api_football',
         )
         if resp.status_code != 200:
-            return None, None
-        teams = resp.json().get('response', [])
-        if not teams:
-            return None, None
-        return teams[0]['team']['id'], teams[0]['team']['name']
-    except Exception:
-        return None, None
+            return None
+        return resp.json().get('response', [])
+
+    key   = '&'.join(f"{k}={params[k]}" for k in sorted(params))
+    fetch = refresh_cached if refresh else cached
+    return fetch('fixtures', key, load, ttl=_fixtures_ttl)
+
+
+def _run_fixture_plan(headers, plan, deadline):
+    """
+    plan: {isim: fixture parametreleri} — çağrılar paralel çalışır.
+    Deadline'a kadar biten ve hata vermeyenler {isim: fixtures} olarak döner;
+    yetişmeyenler arka planda bitip cache'i doldurur.
+    """
+    futures = {name: _sports_pool.submit(_fetch_fixtures, headers, **params) for name, params in plan.items()}
+    done, _ = wait(futures.values(), timeout=max(0.0, deadline - time.monotonic()))
+
+    results = {}
+    for name, future in futures.items():
+        if future in done and future.exception() is None and future.result() is not None:
+            results[name] = future.result()
+    if len(results) < len(plan):
+        missing = sorted(set(plan) - set(results))
+        print(f"⚠️ API-Football: {missing} yetişmedi, kısmi sonuç kullanılıyor", flush=True)
+    return results
 
 
 def _format_fixture(fix):
@@ -186,45 +251,50 @@ def _format_fixture(fix):
     return f"• {date_str} | {league} | {home} vs {away}"
 
 
-def get_sports_data(message_lower):
+def get_sports_data(message_lower, timeout=SPORTS_DEADLINE, signals=None):
     if not API_FOOTBALL_KEY:
         return None
-    if not any(t in message_lower for t in SPORT_TRIGGERS):
+    signals = signals or scan_message(message_lower)
+    if not signals.has('sport'):
         return None
 
-    headers = {
-        'x-rapidapi-host': 'v3.football.api-sports.io',
-        'x-rapidapi-key': API_FOOTBALL_KEY,
-    }
+    deadline = time.monotonic() + timeout
+    headers  = _football_headers()
 
+    # Aynı kulübün farklı yazımları tek takım sayılır — H2H iki farklı takımla çalışır
     found_teams = []
-    for team in ALL_TEAM_KEYWORDS:
-        if team in message_lower:
-            found_teams.append(team)
+    seen_ids    = set()
+    for keyword in signals.terms('team'):
+        team_id, team_name = resolve_team(keyword)
+        if team_id is not None:
+            if team_id in seen_ids:
+                continue
+            seen_ids.add(team_id)
+        found_teams.append((team_id, team_name))
 
     try:
         if len(found_teams) >= 2:
-            team1_id, team1_name = _get_team_id(found_teams[0], headers)
-            team2_id, team2_name = _get_team_id(found_teams[1], headers)
+            (team1_id, team1_name), (team2_id, team2_name) = found_teams[:2]
 
             if not team1_id or not team2_id:
                 return None
 
-            resp = req_lib.get(
-                'https://v3.football.api-sports.io/fixtures',
-                headers=headers,
-                params={'team': team1_id, 'last': 10, 'timezone': 'Europe/Istanbul'},
-                timeout=5
-            )
-            if resp.status_code != 200:
+            # İki takımın son maçları paralel — hangisi yetişirse H2H onunla bulunur
+            results = _run_fixture_plan(headers, {
+                'team1': {'team': team1_id, 'last': 10},
+                'team2': {'team': team2_id, 'last': 10},
+            }, deadline)
+            if not results:
                 return None
 
-            fixtures = resp.json().get('response', [])
-            h2h_fixtures = [
-                f for f in fixtures
-                if f['teams']['home']['id'] == team2_id
-                or f['teams']['away']['id'] == team2_id
-            ]
+            h2h_by_id = {}
+            for fixtures in results.values():
+                for f in fixtures:
+                    home_id = f['teams']['home']['id']
+                    away_id = f['teams']['away']['id']
+                    if {home_id, away_id} == {team1_id, team2_id}:
+                        h2h_by_id[f['fixture']['id']] = f
+            h2h_fixtures = sorted(h2h_by_id.values(), key=lambda f: f['fixture']['date'], reverse=True)
 
             if h2h_fixtures:
                 parts = [f"⚽ {team1_name} vs {team2_name}:"]
@@ -236,28 +306,15 @@ def get_sports_data(message_lower):
             return None
 
         elif len(found_teams) == 1:
-            team_id, team_name = _get_team_id(found_teams[0], headers)
+            team_id, team_name = found_teams[0]
             if not team_id:
                 return None
 
-            last_resp = req_lib.get(
-                'https://v3.football.api-sports.io/fixtures',
-                headers=headers,
-                params={'team': team_id, 'last': 3, 'timezone': 'Europe/Istanbul'},
-                timeout=5
-            )
-            next_resp = req_lib.get(
-                'https://v3.football.api-sports.io/fixtures',
-                headers=headers,
-                params={'team': team_id, 'next': 3, 'timezone': 'Europe/Istanbul'},
-                timeout=5
-            )
-
-            fixtures = []
-            if last_resp.status_code == 200:
-                fixtures += last_resp.json().get('response', [])
-            if next_resp.status_code == 200:
-                fixtures += next_resp.json().get('response', [])
+            results = _run_fixture_plan(headers, {
+                'last': {'team': team_id, 'last': 3},
+                'next': {'team': team_id, 'next': 3},
+            }, deadline)
+            fixtures = results.get('last', []) + results.get('next', [])
 
             if not fixtures:
                 return None
@@ -268,16 +325,10 @@ def get_sports_data(message_lower):
             return '\n'.join(parts)
 
         else:
-            resp = req_lib.get(
-                'https://v3.football.api-sports.io/fixtures',
-                headers=headers,
-                params={'league': TURKISH_LEAGUE_ID, 'last': 5, 'timezone': 'Europe/Istanbul'},
-                timeout=5
-            )
-            if resp.status_code != 200:
-                return None
-
-            fixtures = resp.json().get('response', [])
+            results  = _run_fixture_plan(headers, {
+                'league': {'league': TURKISH_LEAGUE_ID, 'last': 5},
+            }, deadline)
+            fixtures = results.get('league')
             if not fixtures:
                 return None
 
@@ -315,34 +366,55 @@ TR_CITIES = [
 ]
 
 
-def get_weather_data(message_lower, user_location=None):
+def _fetch_weather(city, refresh=False):
+    """OpenWeatherMap anlık hava — şehir bazında cache'lenir."""
+    def load():
+        resp = http_get(
+            'https://api.openweathermap.org/data/2.5/weather',
+            params={'q': f'{city},TR', 'appid': OPENWEATHER_KEY, 'units': 'metric', 'lang': 'tr'},
+            timeout=5,
+            breaker='openweather',
+        )
+        if resp.status_code != 200:
+            return None
+        data = resp.json()
+        return {
+            'temp':      data['main']['temp'],
+            'feels':     data['main']['feels_like'],
+            'desc':      data['weather'][0]['description'],
+            'humidity':  data['main']['humidity'],
+            'wind':      data['wind']['speed'],
+            'city_name': data['name'],
+        }
+
+    fetch = refresh_cached if refresh else cached
+    return fetch('weather', fold(city), load, ttl=CACHE_TTL['weather'])
+
+
+def get_weather_data(message_lower, user_location=None, signals=None):
     if not OPENWEATHER_KEY:
         return None
-    if not any(t in message_lower for t in WEATHER_TRIGGERS):
+    signals = signals or scan_message(message_lower)
+    if not signals.has('weather'):
         return None
 
-    city = next((c for c in TR_CITIES if c in message_lower), None)
+    city = next(iter(signals.terms('city')), None)
     if not city and user_location:
         city = user_location.split(',')[0].strip().lower()
     if not city:
         city = 'Istanbul'
 
     try:
-        resp = req_lib.get(
-            'https://api.openweathermap.org/data/2.5/weather',
-            params={'q': f'{city},TR', 'appid': OPENWEATHER_KEY, 'units': 'metric', 'lang': 'tr'},
-            timeout=5
-        )
-        if resp.status_code != 200:
+        data = _fetch_weather(city)
+        if not data:
             return None
 
-        data      = resp.json()
-        temp      = round(data['main']['temp'])
-        feels     = round(data['main']['feels_like'])
-        desc      = data['weather'][0]['description']
-        humidity  = data['main']['humidity']
-        wind      = round(data['wind']['speed'] * 3.6)
-        city_name = data['name']
+        temp      = round(data['temp'])
+        feels     = round(data['feels'])
+        desc      = data['desc']
+        humidity  = data['humidity']
+        wind      = round(data['wind'] * 3.6)
+        city_name = data['city_name']
 
         if temp <= 5:
             advice = "❄️ Çok soğuk, kalın mont şart!"
@@ -396,9 +468,53 @@ KNOWN_COINS = {
 }
 
 
-def get_finance_data(message_lower):
-    is_finance = any(t in message_lower for t in FINANCE_TRIGGERS)
-    is_crypto  = any(t in message_lower for t in CRYPTO_TRIGGERS)
+def _fetch_fx_rates(refresh=False):
+    """USD bazlı kurlar (TRY, EUR) — tüm kullanıcılar için tek cache anahtarı."""
+    def load():
+        if EXCHANGERATE_KEY:
+            url = f'https://v6.exchangerate-api.com/v6/{EXCHANGERATE_KEY}/latest/USD'
+        else:
+            url = 'https://api.exchangerate-api.com/v4/latest/USD'
+
+        resp = http_get(url, timeout=5, breaker='exchangerate')
+        if resp.status_code != 200:
+            return None
+        rates = resp.json().get('conversion_rates') or resp.json().get('rates', {})
+        return {'TRY': rates.get('TRY', 0), 'EUR': rates.get('EUR', 0)}
+
+    fetch = refresh_cached if refresh else cached
+    return fetch('fx', 'USD', load, ttl=CACHE_TTL['fx'])
+
+
+def _fetch_coin_prices(coin_ids, refresh=False):
+    """CoinGecko simple/price — coin seti bazında cache'lenir."""
+    def load():
+        resp = http_get(
+            'https://api.coingecko.com/api/v3/simple/price',
+            params={
+                'ids': ','.join(coin_ids),
+                'vs_currencies': 'usd,try',
+                'include_24hr_change': 'true',
+            },
+            timeout=5,
+            breaker='coingecko',
+        )
+        if resp.status_code != 200:
+            return None
+        return resp.json()
+
+    fetch = refresh_cached if refresh else cached
+    return fetch('crypto', ','.join(sorted(coin_ids)), load, ttl=CACHE_TTL['crypto'])
+
+
+# Mesajda coin adı yoksa gösterilenler — prefetch de bu seti sıcak tutar
+DEFAULT_COINS = {'bitcoin': 'Bitcoin', 'ethereum': 'Ethereum'}
+
+
+def get_finance_data(message_lower, signals=None):
+    signals    = signals or scan_message(message_lower)
+    is_finance = signals.has('finance')
+    is_crypto  = signals.has('crypto')
 
     if not is_finance and not is_crypto:
         return None
@@ -407,14 +523,8 @@ def get_finance_data(message_lower):
 
     if is_finance:
         try:
-            if EXCHANGERATE_KEY:
-                url = f'https://v6.exchangerate-api.com/v6/{EXCHANGERATE_KEY}/latest/USD'
-            else:
-                url = 'https://api.exchangerate-api.com/v4/latest/USD'
-
-            resp = req_lib.get(url, timeout=5)
-            if resp.status_code == 200:
-                rates    = resp.json().get('conversion_rates') or resp.json().get('rates', {})
+            rates = _fetch_fx_rates()
+            if rates:
                 usd_try  = rates.get('TRY', 0)
                 eur_usd  = rates.get('EUR', 0)
                 eur_try  = round(usd_try / eur_usd, 2) if eur_usd else 0
@@ -427,32 +537,22 @@ def get_finance_data(message_lower):
 
     if is_crypto:
         try:
-            words    = re.findall(r'[a-zA-Z0-9]+', message_lower)
             coin_ids = []
             coin_display = {}
 
-            for word in words:
-                if word in KNOWN_COINS:
-                    cid = KNOWN_COINS[word]
-                    if cid not in coin_ids:
-                        coin_ids.append(cid)
-                        coin_display[cid] = word.upper()
+            # Mesajdaki sırayla, kelime olarak geçen coin'ler
+            for word in signals.terms('coin'):
+                cid = KNOWN_COINS[word]
+                if cid not in coin_ids:
+                    coin_ids.append(cid)
+                    coin_display[cid] = word.upper()
 
             if not coin_ids:
-                coin_ids     = ['bitcoin', 'ethereum']
-                coin_display = {'bitcoin': 'Bitcoin', 'ethereum': 'Ethereum'}
-
-            resp = req_lib.get(
-                'https://api.coingecko.com/api/v3/simple/price',
-                params={
-                    'ids': ','.join(coin_ids),
-                    'vs_currencies': 'usd,try',
-                    'include_24hr_change': 'true',
-                },
-                timeout=5
-            )
-            if resp.status_code == 200:
-                data = resp.json()
+                coin_ids     = list(DEFAULT_COINS)
+                coin_display = dict(DEFAULT_COINS)
+
+            data = _fetch_coin_prices(coin_ids)
+            if data:
                 for coin in coin_ids:
                     if coin not in data:
                         continue
@@ -471,6 +571,73 @@ def get_finance_data(message_lower):
     return '\n'.join(parts) if parts else None
 
 
+# ── Prefetch (scheduler'dan çağrılır) ────────────────────────────────────────
+
+def prefetch_finance():
+    """USD/EUR kurları ve varsayılan coin seti."""
+    _fetch_fx_rates(refresh=True)
+    _fetch_coin_prices(list(DEFAULT_COINS), refresh=True)
+
+
+def prefetch_weather():
+    if not OPENWEATHER_KEY:
+        return
+    for city in list(dict.fromkeys(fold(c) for c in TR_CITIES))[:PREFETCH_WEATHER_CITIES]:
+        _fetch_weather(city, refresh=True)
+
+
+def prefetch_fixtures():
+    """Süper Lig son maçlar — şehir/takım belirtilmeyen spor sorularının cevabı."""
+    if not API_FOOTBALL_KEY:
+        return
+    _fetch_fixtures(_football_headers(), refresh=True, league=TURKISH_LEAGUE_ID, last=5)
+
+
+# ── Tek geçişte mesaj sınıflandırma ──────────────────────────────────────────
+
+_MATCHER = TriggerMatcher(
+    {
+        'sport':      SPORT_TRIGGERS,
+        'recency':    RECENCY_TRIGGERS,
+        'web_search': WEB_SEARCH_TRIGGERS,
+        'info':       INFO_TRIGGERS,
+        'weather':    WEATHER_TRIGGERS,
+        'city':       TR_CITIES,
+        'finance':    FINANCE_TRIGGERS,
+        'crypto':     CRYPTO_TRIGGERS,
+        'team':       ALL_TEAM_KEYWORDS,
+    },
+    token_groups={'coin': list(KNOWN_COINS)},
+)
+
+
+@dataclass
+class MessageSignals:
+    hits:     dict = field(default_factory=dict)   # grup -> eşleşen terimler
+    question: bool = False
+
+    def has(self, group):
+        return group in self.hits
+
+    def terms(self, group):
+        return self.hits.get(group, ())
+
+
+def scan_message(message_lower):
+    """Tüm tetikleyici grupları, takımlar, şehirler ve coin'ler tek taramada."""
+    hits = _MATCHER.scan(message_lower)
+    if 'sport' in hits and len(hits.get('team', ())) < 2:
+        # Spor mesajlarında yazım hatalı takım adları (galatasray) da yakalanır;
+        # iki takım zaten bulunduysa (H2H) gerek yok
+        fuzzy = fuzzy_team_keywords(message_lower, exclude=hits.get('team', ()))
+        if fuzzy:
+            hits['team'] = hits.get('team', ()) + tuple(fuzzy)
+    return MessageSignals(
+        hits=hits,
+        question=QUESTION_RE.search(message_lower) is not None,
+    )
+
+
 # ── Akıllı query oluşturucu ───────────────────────────────────────────────────
 
 def _build_search_query(message):
@@ -490,7 +657,7 @@ def _build_search_query(message):
 
 # ── Ana router ────────────────────────────────────────────────────────────────
 
-def route_query(message, user_location=None):
+def route_query(message, user_location=None, timeout=ROUTE_DEADLINE):
     """
     Öncelik sırası:
     1. Sports API → başarısızsa web search fallback
@@ -499,55 +666,70 @@ def route_query(message, user_location=None):
     4. Web search (trigger varsa)
     5. Soru cümlesi algılanırsa web search
     6. None — AI kendi bilgisiyle cevaplar
+
+    Tüm adımlar toplam `timeout` saniyeyle sınırlı; süre biterse kalan adımlar atlanır.
     """
+    deadline  = time.monotonic() + timeout
     msg_lower = message.lower()
-    recency   = 'w' if needs_recency(msg_lower) else None
+    signals   = scan_message(msg_lower)
+    recency   = 'w' if needs_recency(msg_lower, signals) else None
+    searched  = set()
+
+    def remaining():
+        return deadline - time.monotonic()
+
+    def search(query, recency):
+        # Aynı sorgu bir önceki adımda denendiyse tekrar sorma
+        if (query, recency) in searched or remaining() <= 0:
+            return None
+        searched.add((query, recency))
+        return web_search(query, recency=recency, timeout=min(SEARCH_TIMEOUT, remaining()))
 
     # 1. Spor
-    sports_result = get_sports_data(msg_lower)
+    sports_result = get_sports_data(msg_lower, timeout=min(SPORTS_DEADLINE, remaining()), signals=signals)
     if sports_result:
         print("✅ Router: SPORTS API", flush=True)
         return sports_result, 'sports_api'
 
     # Spor sorusu ama API sonuç vermediyse → web search
-    if any(t in msg_lower for t in SPORT_TRIGGERS):
-        query = _build_search_query(message)
-        search_result = web_search(query, recency='w')
+    if signals.has('sport'):
+        search_result = search(_build_search_query(message), 'w')
         if search_result:
             print("✅ Router: SPORTS → WEB SEARCH fallback", flush=True)
             return search_result, 'web_search'
 
+    if remaining() <= 0:
+        print(f"⚠️ Router deadline ({timeout:.1f}s) aşıldı", flush=True)
+        return None, None
+
     # 2. Hava
-    weather_result = get_weather_data(msg_lower, user_location)
+    weather_result = get_weather_data(msg_lower, user_location, signals)
     if weather_result:
         print("✅ Router: WEATHER API", flush=True)
         return weather_result, 'weather_api'
 
     # 3. Finans
-    finance_result = get_finance_data(msg_lower)
+    finance_result = get_finance_data(msg_lower, signals)
     if finance_result:
         print("✅ Router: FINANCE API", flush=True)
         return finance_result, 'finance_api'
 
     # 4. Web search (trigger veya soru cümlesi)
-    if needs_web_search(message):
-        query = _build_search_query(message)
-        search_result = web_search(query, recency=recency)
+    if needs_web_search(message, signals):
+        search_result = search(_build_search_query(message), recency)
         if search_result:
             print(f"✅ Router: WEB SEARCH (recency={recency})", flush=True)
             return search_result, 'web_search'
 
         # İlk arama başarısız → farklı query ile tekrar dene
-        fallback_query = ' '.join(message.split()[:6])
-        search_result = web_search(fallback_query, recency=None)
+        search_result = search(' '.join(message.split()[:6]), None)
         if search_result:
             print("✅ Router: WEB SEARCH (fallback query)", flush=True)
             return search_result, 'web_search'
 
     # 5. Son çare — soru cümlesi ama trigger yoksa bile dene
-    if is_question(message) and len(message.split()) >= 3:
-        query = _build_search_query(message)
-        search_result = web_search(query, recency=recency)
+    if signals.question and len(message.split()) >= 3:
+        search_result = search(_build_search_query(message), recency)
         if search_result:
             print("✅ Router: WEB SEARCH (question fallback)", flush=True)
             return search_result, 'web_search'
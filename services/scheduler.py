@@ -1,11 +1,23 @@
 # services/scheduler.py
 import time
 import json
+import uuid
+import threading
 import traceback as tb
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from config import TURKEY_TZ, FIREBASE_CREDENTIALS_JSON
+from apscheduler.triggers.interval import IntervalTrigger
+from config import (
+    TURKEY_TZ, FIREBASE_CREDENTIALS_JSON, FCM_BATCH_SIZE,
+    PREFETCH_FINANCE_INTERVAL, PREFETCH_WEATHER_INTERVAL, PREFETCH_FIXTURES_INTERVAL,
+    NOTIFY_WORKERS, NOTIFY_OPENAI_RATE, NOTIFY_OPENAI_BURST,
+    NOTIFY_FCM_RATE, NOTIFY_FCM_BURST, NOTIFY_SEND_BATCH, NOTIFY_PROGRESS_EVERY,
+    LEADER_FAILOVER_WINDOW,
+)
+from services.ratelimit import TokenBucket
+from services.text import fold
 
 try:
     import firebase_admin
@@ -40,51 +52,145 @@ def init_firebase():
         return False
 
 
+def _platform_configs():
+    android = fcm_messaging.AndroidConfig(
+        priority='high',
+        notification=fcm_messaging.AndroidNotification(
+            color='#9333EA',
+            sound='default',
+            channel_id='dostai_notifications',
+        )
+    )
+    apns = fcm_messaging.APNSConfig(
+        payload=fcm_messaging.APNSPayload(
+            aps=fcm_messaging.Aps(sound='default', badge=1)
+        )
+    )
+    return android, apns
+
+
+def _build_message(fcm_token, title, body, data=None):
+    android, apns = _platform_configs()
+    return fcm_messaging.Message(
+        notification=fcm_messaging.Notification(title=title, body=body),
+        data=data or {},
+        token=fcm_token,
+        android=android,
+        apns=apns,
+    )
+
+
+def _is_unregistered(error):
+    if isinstance(error, fcm_messaging.UnregisteredError):
+        return True
+    err_str = str(error)
+    return 'Requested entity was not found' in err_str or 'registration-token-not-registered' in err_str
+
+
 def send_push_notification(fcm_token, title, body, data=None):
     if not _firebase_initialized or not fcm_token:
         return False
     try:
-        message = fcm_messaging.Message(
-            notification=fcm_messaging.Notification(title=title, body=body),
-            data=data or {},
-            token=fcm_token,
-            android=fcm_messaging.AndroidConfig(
-                priority='high',
-                notification=fcm_messaging.AndroidNotification(
-                    color='#9333EA',
-                    sound='default',
-                    channel_id='dostai_notifications',
-                )
-            ),
-            apns=fcm_messaging.APNSConfig(
-                payload=fcm_messaging.APNSPayload(
-                    aps=fcm_messaging.Aps(sound='default', badge=1)
-                )
-            )
-        )
-        response = fcm_messaging.send(message)
+        response = fcm_messaging.send(_build_message(fcm_token, title, body, data))
         print(f"✅ FCM gönderildi: {response}", flush=True)
         return True
     except Exception as e:
-        err_str = str(e)
-        if 'Requested entity was not found' in err_str or 'registration-token-not-registered' in err_str:
-            _clear_fcm_token(fcm_token)
+        if _is_unregistered(e):
+            _clear_fcm_tokens([fcm_token])
         else:
             print(f"❌ FCM error: {e}", flush=True)
         return False
 
 
-def _clear_fcm_token(fcm_token):
+def send_push_batch(notifications, clear_unregistered=True):
+    """
+    Farklı içerikli bildirimleri FCM_BATCH_SIZE'lık send_each çağrılarıyla gönderir.
+    notifications: [(fcm_token, title, body, data), ...] — aynı sırayla
+    [(durum, hata), ...] döner; durum 'sent' / 'failed' / 'unregistered'.
+    Kayıtsız token'lar tek UPDATE ile temizlenir (clear_unregistered=False ise
+    temizlik çağırana kalır).
+    """
+    if not _firebase_initialized:
+        return [('failed', 'firebase devre dışı')] * len(notifications)
+
+    results = [('failed', 'fcm token yok')] * len(notifications)
+    for offset in range(0, len(notifications), FCM_BATCH_SIZE):
+        chunk = [
+            (offset + i, n) for i, n in enumerate(notifications[offset:offset + FCM_BATCH_SIZE])
+            if n[0]
+        ]
+        if not chunk:
+            continue
+        try:
+            batch = fcm_messaging.send_each([_build_message(*n) for _, n in chunk])
+        except Exception as e:
+            print(f"❌ FCM batch error: {e}", flush=True)
+            for idx, _ in chunk:
+                results[idx] = ('failed', str(e))
+            continue
+        for (idx, _), resp in zip(chunk, batch.responses):
+            if resp.success:
+                results[idx] = ('sent', None)
+            elif _is_unregistered(resp.exception):
+                results[idx] = ('unregistered', str(resp.exception))
+            else:
+                results[idx] = ('failed', str(resp.exception))
+                print(f"❌ FCM error: {resp.exception}", flush=True)
+
+    unregistered = [n[0] for n, (status, _) in zip(notifications, results) if status == 'unregistered']
+    if unregistered and clear_unregistered:
+        _clear_fcm_tokens(unregistered)
+    sent = sum(1 for status, _ in results if status == 'sent')
+    print(f"✅ FCM batch: {sent}/{len(notifications)} gönderildi", flush=True)
+    return results
+
+
+def send_push_multicast(fcm_tokens, title, body, data=None):
+    """Aynı içeriği token listesine send_each_for_multicast ile gönderir; (başarılı, başarısız) döner."""
+    fcm_tokens = [t for t in dict.fromkeys(fcm_tokens) if t]
+    if not _firebase_initialized or not fcm_tokens:
+        return 0, len(fcm_tokens)
+
+    android, apns = _platform_configs()
+    success, fail = 0, 0
+    unregistered  = []
+    for offset in range(0, len(fcm_tokens), FCM_BATCH_SIZE):
+        chunk = fcm_tokens[offset:offset + FCM_BATCH_SIZE]
+        try:
+            batch = fcm_messaging.send_each_for_multicast(fcm_messaging.MulticastMessage(
+                tokens=chunk,
+                notification=fcm_messaging.Notification(title=title, body=body),
+                data=data or {},
+                android=android,
+                apns=apns,
+            ))
+        except Exception as e:
+            print(f"❌ FCM multicast error: {e}", flush=True)
+            fail += len(chunk)
+            continue
+        success += batch.success_count
+        fail    += batch.failure_count
+        for token, resp in zip(chunk, batch.responses):
+            if not resp.success and _is_unregistered(resp.exception):
+                unregistered.append(token)
+
+    if unregistered:
+        _clear_fcm_tokens(unregistered)
+    return success, fail
+
+
+def _clear_fcm_tokens(fcm_tokens):
     from database import get_db, release_db
     conn = None
     try:
         conn = get_db()
         cursor = conn.cursor()
-        cursor.execute("UPDATE users SET fcm_token = NULL WHERE fcm_token = %s", (fcm_token,))
+        cursor.execute("UPDATE users SET fcm_token = NULL WHERE fcm_token = ANY(%s)", (list(fcm_tokens),))
         conn.commit()
         cursor.close()
+        print(f"🧹 Kayıtsız FCM token temizlendi: {len(fcm_tokens)}", flush=True)
     except Exception as e:
-        print(f"_clear_fcm_token error: {e}", flush=True)
+        print(f"_clear_fcm_tokens error: {e}", flush=True)
     finally:
         release_db(conn)
 
@@ -122,74 +228,127 @@ def get_users_for_notification():
         release_db(conn)
 
 
-def update_last_notified(user_id):
-    from database import get_db, release_db
+def record_deliveries(job_name, deliveries):
+    """
+    Bir gönderim batch'inin sonucunu tek transaction'da yazar: başarılı
+    kullanıcıların last_notified_at'i, kayıtsız token temizliği ve
+    notification_log satırları (COPY).
+    deliveries: [(notification_id, user, title, body, durum, hata), ...]
+    """
+    from database import get_db, release_db, copy_rows
+    sent_ids    = tuple(user['id'] for _, user, _, _, status, _ in deliveries if status == 'sent')
+    dead_tokens = [user['fcm_token'] for _, user, _, _, status, _ in deliveries if status == 'unregistered']
     conn = None
     try:
         conn = get_db()
         cursor = conn.cursor()
-        cursor.execute("UPDATE users SET last_notified_at = NOW() WHERE id = %s", (user_id,))
+        if sent_ids:
+            cursor.execute("UPDATE users SET last_notified_at = NOW() WHERE id IN %s", (sent_ids,))
+        if dead_tokens:
+            cursor.execute("UPDATE users SET fcm_token = NULL WHERE fcm_token = ANY(%s)", (dead_tokens,))
+        copy_rows(
+            cursor, 'notification_log',
+            ('id', 'user_id', 'job', 'status', 'error', 'title', 'body'),
+            [
+                (nid, str(user['id']), job_name, status, error, title, body)
+                for nid, user, title, body, status, error in deliveries
+            ],
+        )
         conn.commit()
         cursor.close()
     except Exception as e:
-        print(f"update_last_notified error: {e}", flush=True)
+        print(f"record_deliveries error: {e}", flush=True)
+        if conn:
+            try: conn.rollback()
+            except: pass
     finally:
         release_db(conn)
 
 
 # ── Kişiselleştirilmiş bildirim üretimi ──────────────────────────────────────
 
-def generate_personalized_notification(user, client):
-    from services.learning import (
-        get_learned_facts, get_emotion_history,
-        build_emotion_summary,
-    )
-    from services.router import get_weather_data, get_sports_data
-    from config import TURKEY_TZ
+def build_notification_profile(user):
+    """Bildirim için kullanıcı profili: öğrenilen bilgiler, duygu geçmişi, konum, takım..."""
+    from services.learning import get_learned_facts, get_emotion_history
 
     user_id   = user['id']
     device_id = user.get('device_id') or str(user_id)
 
-    try:
-        turkey_time     = datetime.now(TURKEY_TZ)
-        learned_facts   = get_learned_facts(user_id, limit=30)
-        emotion_history = get_emotion_history(device_id, days=7)
-
-        # ── Profil çıkar ──────────────────────────────────────────────────────
-        location         = None
-        favorite_team    = None
-        health_issues    = []
-        interests        = []
-        work_info        = None
-        important_events = []
+    profile = {
+        'learned_facts':    get_learned_facts(user_id, limit=30),
+        'emotion_history':  get_emotion_history(device_id, days=7),
+        'location':         None,
+        'favorite_team':    None,
+        'health_issues':    [],
+        'interests':        [],
+        'work_info':        None,
+        'important_events': [],
+    }
 
-        for fact in learned_facts:
-            cat        = fact.get('category', '')
-            val        = fact.get('value', '')
-            ctx        = fact.get('context') or val
-            importance = float(fact.get('importance', 0.5))
+    for fact in profile['learned_facts']:
+        cat        = fact.get('category', '')
+        val        = fact.get('value', '')
+        ctx        = fact.get('context') or val
+        importance = float(fact.get('importance', 0.5))
 
-            if cat == 'location' and not location and importance >= 0.7:
-                location = val
+        if cat == 'location' and not profile['location'] and importance >= 0.7:
+            profile['location'] = val
 
-            if cat == 'sports' and not favorite_team:
-                lower = val.lower()
-                for team in ['fenerbahçe', 'galatasaray', 'beşiktaş', 'trabzonspor']:
-                    if team in lower:
-                        favorite_team = team.title()
-                        break
+        if cat == 'sports' and not profile['favorite_team']:
+            lower = val.lower()
+            for team in ['fenerbahçe', 'galatasaray', 'beşiktaş', 'trabzonspor']:
+                if team in lower:
+                    profile['favorite_team'] = team.title()
+                    break
 
-            if cat == 'health' and importance >= 0.75:
-                health_issues.append(ctx)
+        if cat == 'health' and importance >= 0.75:
+            profile['health_issues'].append(ctx)
 
-            if cat in ['music', 'movies', 'hobbies', 'food'] and ctx:
-                interests.append(ctx)
+        if cat in ['music', 'movies', 'hobbies', 'food'] and ctx:
+            profile['interests'].append(ctx)
 
-            if cat == 'work' and ctx:
-                work_info = ctx
+        if cat == 'work' and ctx:
+            profile['work_info'] = ctx
 
-            if cat == 'life_events' and importance >= 0.7:
-                important_events.append(ctx)
+        if cat == 'life_events' and importance >= 0.7:
+            profile['important_events'].append(ctx)
+
+    return profile
+
+
+def fetch_weather_info(location):
+    from services.router import get_weather_data
+    return get_weather_data(f"hava {location}", location) or ""
+
+
+def fetch_sport_info(favorite_team):
+    """Favori takımın maç bilgisi (maç var mı / son sonuç)."""
+    from services.router import get_sports_data
+    return (get_sports_data(f"{favorite_team.lower()} maç") or "")[:300]
+
+
+def generate_personalized_notification(user, client, profile=None, weather_info=None, sport_info=None):
+    """
+    profile / weather_info / sport_info verilmezse burada hesaplanır; toplu job
+    bunları önceden (şehir ve takım başına bir kez) hazırlayıp geçirir.
+    """
+    from services.learning import build_emotion_summary
+    from services.ai_service import ai_call
+    from config import TURKEY_TZ
+
+    try:
+        turkey_time = datetime.now(TURKEY_TZ)
+        if profile is None:
+            profile = build_notification_profile(user)
+
+        learned_facts    = profile['learned_facts']
+        emotion_history  = profile['emotion_history']
+        location         = profile['location']
+        favorite_team    = profile['favorite_team']
+        health_issues    = profile['health_issues']
+        interests        = profile['interests']
+        work_info        = profile['work_info']
+        important_events = profile['important_events']
 
         # ── Duygu özeti ───────────────────────────────────────────────────────
         emotion_summary = build_emotion_summary(emotion_history)
@@ -198,18 +357,12 @@ def generate_personalized_notification(user, client):
             recent_emotion = emotion_history[0].get('emotion', 'neutral')
 
         # ── Hava durumu ───────────────────────────────────────────────────────
-        weather_info = ""
-        if location:
-            w = get_weather_data(f"hava {location}", location)
-            if w:
-                weather_info = w
+        if weather_info is None:
+            weather_info = fetch_weather_info(location) if location else ""
 
         # ── Spor — favori takım maç var mı? ──────────────────────────────────
-        sport_info = ""
-        if favorite_team:
-            s = get_sports_data(f"{favorite_team.lower()} maç")
-            if s:
-                sport_info = s[:300]
+        if sport_info is None:
+            sport_info = fetch_sport_info(favorite_team) if favorite_team else ""
 
         # ── Unutulan önemli konular ───────────────────────────────────────────
         today    = turkey_time.date()
@@ -286,7 +439,8 @@ SADECE bu formatta yaz (başka hiçbir şey yazma):
 BASLIK: (maks 45 karakter)
 MESAJ: (maks 100 karakter)"""
 
-        resp = client.chat.completions.create(
+        resp = ai_call(
+            'notification', client.chat.completions.create,
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
             max_tokens=100,
@@ -318,42 +472,285 @@ MESAJ: (maks 100 karakter)"""
 
 
 # ── Job ───────────────────────────────────────────────────────────────────────
+#
+# Önce kullanıcı profilleri çıkarılır; hava durumu ve maç bilgisi her farklı
+# şehir/takım için bir kez çekilip o çalışmadaki tüm kullanıcılarla paylaşılır.
+# Bildirim üretimi (gpt-4o) NOTIFY_WORKERS thread'de paralel yürür; job
+# thread'i biten üretimleri NOTIFY_SEND_BATCH'lik send_each çağrılarıyla
+# gönderir (üretim ve gönderim örtüşür). OpenAI ve FCM çağrıları token bucket
+# ile hız sınırlıdır. Her batch'in sonucu (last_notified_at, token temizliği,
+# notification_log) gönderimden hemen sonra yazıldığı için yarıda kalan job
+# yeniden çalıştırılınca bildirim almış kullanıcılar atlanır.
+
+_openai_bucket = TokenBucket(NOTIFY_OPENAI_RATE, NOTIFY_OPENAI_BURST)
+_fcm_bucket    = TokenBucket(NOTIFY_FCM_RATE, NOTIFY_FCM_BURST)
+
+_report_lock = threading.Lock()
+_job_reports = {}   # job_name -> son çalışmanın raporu (süren çalışma dahil)
+
+STAGES = ('profile', 'context', 'generate', 'send', 'update')
+
+
+def _safe_profile(user):
+    started = time.monotonic()
+    try:
+        profile = build_notification_profile(user)
+    except Exception as e:
+        print(f"❌ Notification profile error user {user['id']}: {e}", flush=True)
+        profile = None   # üretim sırasında tekrar denenir
+    return profile, time.monotonic() - started
+
+
+def _safe_fetch(fetch, arg):
+    try:
+        return fetch(arg)
+    except Exception as e:
+        print(f"⚠️ Notification context error ({arg}): {e}", flush=True)
+        return ""
+
+
+def _prepare_context(pool, users, timings, report):
+    """
+    Profilleri paralel çıkarır, sonra farklı şehirlerin hava durumunu ve farklı
+    takımların maç bilgisini birer kez çeker. Kullanıcı sırasıyla
+    [(profile, weather_info, sport_info), ...] döner.
+    """
+    profiles = []
+    for profile, elapsed in pool.map(_safe_profile, users):
+        profiles.append(profile)
+        timings['profile'].append(elapsed)
+
+    started = time.monotonic()
+    cities  = {}
+    teams   = set()
+    for profile in filter(None, profiles):
+        if profile['location']:
+            cities.setdefault(fold(profile['location']).strip(), profile['location'])
+        if profile['favorite_team']:
+            teams.add(profile['favorite_team'])
+
+    weather_futures = {key: pool.submit(_safe_fetch, fetch_weather_info, loc) for key, loc in cities.items()}
+    sport_futures   = {team: pool.submit(_safe_fetch, fetch_sport_info, team) for team in teams}
+    weather = {key: f.result() for key, f in weather_futures.items()}
+    sports  = {team: f.result() for team, f in sport_futures.items()}
+    timings['context'].append(time.monotonic() - started)
+    report['shared_context'] = {'cities': len(cities), 'teams': len(teams)}
+
+    contexts = []
+    for profile in profiles:
+        if profile is None:
+            contexts.append((None, None, None))
+            continue
+        location, team = profile['location'], profile['favorite_team']
+        contexts.append((
+            profile,
+            weather[fold(location).strip()] if location else "",
+            sports[team] if team else "",
+        ))
+    return contexts
+
+
+def _generate(user, client, profile, weather_info, sport_info):
+    # Her üretim tam olarak bir gpt-4o çağrısı yapar
+    _openai_bucket.acquire()
+    started = time.monotonic()
+    title, body = generate_personalized_notification(
+        user, client, profile=profile, weather_info=weather_info, sport_info=sport_info,
+    )
+    return title, body, time.monotonic() - started
+
+
+def _send_batch(batch, job_name, timings):
+    """[(user, title, body), ...] tek send_each ile gider; kullanıcı başına sonuç döner."""
+    ids = [uuid.uuid4().hex for _ in batch]
+    notifications = [
+        (user['fcm_token'], title, body,
+         {'type': 'proactive', 'screen': 'chat', 'job': job_name, 'notification_id': nid})
+        for nid, (user, title, body) in zip(ids, batch)
+    ]
+    _fcm_bucket.acquire(len(batch))
+    started = time.monotonic()
+    results = send_push_batch(notifications, clear_unregistered=False)
+    timings['send'].append(time.monotonic() - started)
+
+    started = time.monotonic()
+    record_deliveries(job_name, [
+        (nid, user, title, body, status, error)
+        for nid, (user, title, body), (status, error) in zip(ids, batch, results)
+    ])
+    timings['update'].append(time.monotonic() - started)
+    return ['success' if status == 'sent' else 'failed' for status, _ in results]
+
+
+def _tally(report, outcomes, started):
+    with _report_lock:
+        before = report['processed']
+        for outcome in outcomes:
+            report[outcome] += 1
+        report['processed'] += len(outcomes)
+        processed = report['processed']
+    if processed // NOTIFY_PROGRESS_EVERY > before // NOTIFY_PROGRESS_EVERY:
+        print(
+            f"⏳ Job ilerleme ({report['job']}): {processed}/{report['users']} — "
+            f"{report['success']} başarılı, {report['failed']} başarısız "
+            f"({time.monotonic() - started:.0f}s)",
+            flush=True,
+        )
+
+
+def _stage_stats(samples):
+    if not samples:
+        return {'count': 0, 'avg_ms': None, 'p95_ms': None}
+    ordered = sorted(samples)
+    return {
+        'count':  len(ordered),
+        'avg_ms': round(sum(ordered) / len(ordered) * 1000, 1),
+        'p95_ms': round(ordered[max(0, int(len(ordered) * 0.95) - 1)] * 1000, 1),
+    }
+
 
 def run_notification_job(job_name="scheduled"):
     from services.ai_service import get_client
 
+    started     = time.monotonic()
     turkey_time = datetime.now(TURKEY_TZ)
     print(f"🔔 Notification job başladı ({job_name}): {turkey_time.strftime('%H:%M')}", flush=True)
 
-    client = get_client()
-    users  = get_users_for_notification()
-    print(f"📱 Bildirim gönderilecek: {len(users)} kullanıcı", flush=True)
-
-    success_count = 0
-    fail_count    = 0
-
-    for user in users:
-        try:
-            title, body = generate_personalized_notification(user, client)
+    report = {
+        'job':         job_name,
+        'status':      'running',
+        'started_at':  turkey_time.isoformat(),
+        'finished_at': None,
+        'users':       0,
+        'processed':   0,
+        'success':     0,
+        'failed':      0,
+        'skipped':     0,
+    }
+    with _report_lock:
+        _job_reports[job_name] = report
+
+    timings = {stage: [] for stage in STAGES}
+    waited  = {'openai': _openai_bucket.waited(), 'fcm': _fcm_bucket.waited()}
+    pool    = None
+    try:
+        client = get_client()
+        users  = get_users_for_notification()
+        report['users'] = len(users)
+        print(f"📱 Bildirim gönderilecek: {len(users)} kullanıcı", flush=True)
+
+        pool    = ThreadPoolExecutor(max_workers=NOTIFY_WORKERS, thread_name_prefix='notify')
+        contexts = _prepare_context(pool, users, timings, report)
+        futures  = {
+            pool.submit(_generate, user, client, *context): user
+            for user, context in zip(users, contexts)
+        }
+        pending = []   # gönderilmeyi bekleyen (user, title, body)
+        for future in as_completed(futures):
+            user = futures[future]
+            try:
+                title, body, generate_s = future.result()
+                timings['generate'].append(generate_s)
+            except Exception as e:
+                print(f"❌ Notification error user {user['id']}: {e}", flush=True)
+                _tally(report, ['failed'], started)
+                continue
             if not title or not body:
+                _tally(report, ['skipped'], started)
                 continue
-            sent = send_push_notification(
-                fcm_token=user['fcm_token'],
-                title=title,
-                body=body,
-                data={'type': 'proactive', 'screen': 'chat', 'job': job_name}
-            )
-            if sent:
-                update_last_notified(user['id'])
-                success_count += 1
-            else:
-                fail_count += 1
-            time.sleep(0.3)
-        except Exception as e:
-            print(f"❌ Notification error user {user['id']}: {e}", flush=True)
-            fail_count += 1
 
-    print(f"✅ Job bitti: {success_count} başarılı, {fail_count} başarısız", flush=True)
+            pending.append((user, title, body))
+            if len(pending) >= NOTIFY_SEND_BATCH:
+                _tally(report, _send_batch(pending, job_name, timings), started)
+                pending = []
+        if pending:
+            _tally(report, _send_batch(pending, job_name, timings), started)
+        status = 'done'
+    except Exception as e:
+        print(f"❌ Notification job error ({job_name}): {e}", flush=True)
+        tb.print_exc()
+        status = 'error'
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    duration = time.monotonic() - started
+    with _report_lock:
+        report.update({
+            'status':      status,
+            'finished_at': datetime.now(TURKEY_TZ).isoformat(),
+            'duration_s':  round(duration, 1),
+            'stages':      {stage: _stage_stats(timings[stage]) for stage in STAGES},
+            'rate_wait_s': {
+                'openai': round(_openai_bucket.waited() - waited['openai'], 1),
+                'fcm':    round(_fcm_bucket.waited() - waited['fcm'], 1),
+            },
+        })
+
+    print(
+        f"✅ Job bitti ({job_name}): {report['success']} başarılı, {report['failed']} başarısız, "
+        f"{report['skipped']} atlandı — {duration:.1f}s",
+        flush=True,
+    )
+    return report
+
+
+def run_exclusive_notification_job(job_name, scheduled=True):
+    """
+    Bildirim job'unu tüm worker/replica'lar arasında tek process'te çalıştırır.
+    Zamanlanmış çalışmalar (job + saat) tamamlanma kaydı tutar; lider yarıda
+    ölürse bekleyen process LEADER_FAILOVER_WINDOW içinde devralır.
+    """
+    from services.leader import run_exclusive
+    run_key = None
+    if scheduled:
+        run_key = f"{job_name}:{datetime.now(TURKEY_TZ).strftime('%Y-%m-%dT%H')}"
+    return run_exclusive(
+        'notification_job', lambda: run_notification_job(job_name),
+        run_key=run_key, failover=LEADER_FAILOVER_WINDOW if scheduled else 0,
+    )
+
+
+def get_notification_reports():
+    """Her bildirim job'unun son çalışma raporu (bu process'e ait)."""
+    with _report_lock:
+        return {name: dict(report) for name, report in _job_reports.items()}
+
+
+# ── Prefetch ──────────────────────────────────────────────────────────────────
+
+def _run_prefetch(name, fn, interval):
+    from services.leader import acquire_lease
+    # Cache Redis'te paylaşılıyorsa her periyotta tek process çeker
+    if not acquire_lease(name, interval * 0.9):
+        return
+    try:
+        fn()
+    except Exception as e:
+        print(f"⚠️ Prefetch error ({name}): {e}", flush=True)
+
+
+def _add_prefetch_jobs():
+    """Router'ın en çok sorulan verilerini cache'te sıcak tutar; ilk çalışma hemen."""
+    from services.router import prefetch_finance, prefetch_weather, prefetch_fixtures
+
+    jobs = [
+        ('prefetch_finance',  'Kur + kripto prefetch', prefetch_finance,  PREFETCH_FINANCE_INTERVAL),
+        ('prefetch_weather',  'Hava durumu prefetch',  prefetch_weather,  PREFETCH_WEATHER_INTERVAL),
+        ('prefetch_fixtures', 'Süper Lig prefetch',    prefetch_fixtures, PREFETCH_FIXTURES_INTERVAL),
+    ]
+    for job_id, name, fn, interval in jobs:
+        scheduler.add_job(
+            func=_run_prefetch,
+            args=(job_id, fn, interval),
+            trigger=IntervalTrigger(seconds=interval, timezone=TURKEY_TZ),
+            id=job_id,
+            name=name,
+            replace_existing=True,
+            next_run_time=datetime.now(TURKEY_TZ),
+            max_instances=1,
+            coalesce=True,
+        )
 
 
 # ── Scheduler başlatma ────────────────────────────────────────────────────────
@@ -363,7 +760,8 @@ def start_scheduler():
         return
 
     scheduler.add_job(
-        func=lambda: run_notification_job("morning"),
+        func=run_exclusive_notification_job,
+        args=("morning",),
         trigger=CronTrigger(hour=9, minute=0, timezone=TURKEY_TZ),
         id='morning_notification',
         name='Sabah 09:00 bildirimi',
@@ -371,12 +769,14 @@ def start_scheduler():
         misfire_grace_time=300,
     )
     scheduler.add_job(
-        func=lambda: run_notification_job("afternoon"),
+        func=run_exclusive_notification_job,
+        args=("afternoon",),
         trigger=CronTrigger(hour=13, minute=0, timezone=TURKEY_TZ),
         id='afternoon_notification',
         name='Öğlen 13:00 bildirimi',
         replace_existing=True,
         misfire_grace_time=300,
     )
+    _add_prefetch_jobs()
     scheduler.start()
-    print("✅ APScheduler başlatıldı! (09:00 + 13:00 TR saati)")
+    print("✅ APScheduler başlatıldı! (09:00 + 13:00 TR saati, veri prefetch)")
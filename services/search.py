@@ -1,34 +1,113 @@
 # services/search.py
 import re
-import requests as req_lib
-from config import TAVILY_API_KEY, SERPER_API_KEY
+import time
+import codecs
+import threading
+from html.parser import HTMLParser
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import (
+    TAVILY_API_KEY, SERPER_API_KEY,
+    SEARCH_WORKERS, SEARCH_TIMEOUT, SEARCH_HEDGE_DELAY, SEARCH_HEDGE_MIN, SEARCH_HEDGE_MAX,
+    SEARCH_CACHE_TTL, SEARCH_NEGATIVE_TTL, SEARCH_STALE_RATIO, PAGE_FETCH_MAX_BYTES, PAGE_CACHE_TTL,
+)
+from services.cache import cached
+from services.text import fold
+from services.http_client import http_get, http_post
 
+_search_pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix='search')
 
-def fetch_page_content(url, max_chars=2000):
-    try:
-        resp = req_lib.get(url, timeout=6, headers={
-            'User-Agent': 'Mozilla/5.0 (compatible; DostAI/1.0)'
-        })
+
+# ── Sayfa içeriği ─────────────────────────────────────────────────────────────
+
+class _TextExtractor(HTMLParser):
+    """script/style dışındaki metni toplar; yeterli metin birikince `done` olur."""
+    SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg'}
+
+    def __init__(self, max_chars):
+        super().__init__()
+        self.max_chars = max_chars
+        self.parts     = []
+        self.length    = 0
+        self.skip      = 0
+        self.done      = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self.skip:
+            self.skip -= 1
+
+    def handle_data(self, data):
+        if self.skip or self.done:
+            return
+        text = ' '.join(data.split())
+        if text:
+            self.parts.append(text)
+            self.length += len(text) + 1
+            self.done = self.length >= self.max_chars
+
+    def text(self):
+        return ' '.join(self.parts)[:self.max_chars]
+
+
+def _charset(resp):
+    content_type = resp.headers.get('Content-Type', '')
+    match = re.search(r'charset=([\w-]+)', content_type, re.I)
+    return match.group(1) if match else 'utf-8'
+
+
+def _extract_page_text(url, max_chars):
+    """Sayfayı parça parça indirir; bayt sınırına ya da yeterli metne ulaşınca keser."""
+    with http_get(url, timeout=6, stream=True, headers={
+        'User-Agent': 'Mozilla/5.0 (compatible; DostAI/1.0)'
+    }) as resp:
         if resp.status_code != 200:
             return None
-        text = resp.text
-        text = re.sub(r'<script[^>]*>.*?</script>', ' ', text, flags=re.DOTALL)
-        text = re.sub(r'<style[^>]*>.*?</style>', ' ', text, flags=re.DOTALL)
-        text = re.sub(r'<[^>]+>', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text[:max_chars] if text else None
-    except Exception as e:
-        print(f"fetch_page_content error: {e}")
-        return None
+        content_type = resp.headers.get('Content-Type', '')
+        if content_type and 'html' not in content_type and not content_type.startswith('text/'):
+            return None
+
+        try:
+            decoder = codecs.getincrementaldecoder(_charset(resp))(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        parser = _TextExtractor(max_chars)
+        read   = 0
+        for chunk in resp.iter_content(chunk_size=16 * 1024):
+            read += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done or read >= PAGE_FETCH_MAX_BYTES:
+                break
+        parser.close()
+
+    return parser.text() or ''
+
+
+def fetch_page_content(url, max_chars=2000):
+    """Sayfanın düz metni (ilk `max_chars` karakter); URL bazında cache'lenir."""
+    def load():
+        try:
+            return _extract_page_text(url, max_chars)
+        except Exception as e:
+            print(f"fetch_page_content error: {e}")
+            return None
+
+    text = cached('page', f"{max_chars}:{url}", load,
+                  ttl=lambda text: PAGE_CACHE_TTL if text else SEARCH_NEGATIVE_TTL)
+    return text or None
 
 
 def serper_search(query, num=5, recency=None):
     """
     recency: 'h' = son 1 saat, 'd' = son 1 gün, 'w' = son 1 hafta,
              'm' = son 1 ay, 'y' = son 1 yıl, None = filtresiz
+    Sonuç metni; sonuç yoksa (ya da anahtar tanımlı değilse) '', hata/açık devrede None.
     """
     if not SERPER_API_KEY:
-        return None
+        return ''
     try:
         payload = {
             'q': query,
@@ -40,11 +119,12 @@ def serper_search(query, num=5, recency=None):
         if recency:
             payload['tbs'] = f'qdr:{recency}'
 
-        response = req_lib.post(
+        response = http_post(
             'https://google.serper.dev/search',
             headers={'X-API-KEY': SERPER_API_KEY, 'Content-Type': 'application/json'},
             json=payload,
-            timeout=8
+            timeout=8,
+            breaker='serper',
         )
         if response.status_code != 200:
             return None
@@ -80,18 +160,18 @@ def serper_search(query, num=5, recency=None):
             if full_content:
                 parts.append(f"\n[Tam içerik]:\n{full_content}")
 
-        result = '\n'.join(parts)
-        return result if result else None
+        return '\n'.join(parts)
     except Exception as e:
         print(f"Serper error: {e}")
         return None
 
 
 def tavily_search(query, max_results=5):
+    """serper_search ile aynı sözleşme: sonuç yoksa '', hata/açık devrede None."""
     if not TAVILY_API_KEY:
-        return None
+        return ''
     try:
-        response = req_lib.post(
+        response = http_post(
             'https://api.tavily.com/search',
             json={
                 'api_key': TAVILY_API_KEY,
@@ -101,7 +181,8 @@ def tavily_search(query, max_results=5):
                 'include_answer': True,
                 'language': 'tr',
             },
-            timeout=8
+            timeout=8,
+            breaker='tavily',
         )
         if response.status_code != 200:
             return None
@@ -121,13 +202,148 @@ def tavily_search(query, max_results=5):
                 date_str = f" [{published}]" if published else ""
                 parts.append(f"- {title}{date_str}: {snippet}")
 
-        result = '\n'.join(parts)
-        return result if result else None
+        return '\n'.join(parts)
     except Exception as e:
         print(f"Tavily error: {e}")
         return None
 
 
-def web_search(query, recency=None):
-    """Önce Serper, olmazsa Tavily."""
-    return serper_search(query, recency=recency) or tavily_search(query)
+# ── Hedge'li arama ────────────────────────────────────────────────────────────
+# Serper başlatılır; p95 gecikmesi içinde iyi sonuç dönmezse (ya da boş/hatalı
+# dönerse) Tavily de başlatılır ve ilk iyi sonuç kullanılır. Geride kalan çağrı
+# beklenmez — thread'i kendi timeout'uyla biter, sonucu atılır.
+
+_latency_lock = threading.Lock()
+_latencies    = {'serper': deque(maxlen=200), 'tavily': deque(maxlen=200)}
+_search_stats = {'searches': 0, 'hedged': 0, 'serper_wins': 0, 'tavily_wins': 0, 'empty': 0, 'failed': 0}
+
+
+def _timed(provider, fn, *args, **kwargs):
+    started = time.monotonic()
+    result  = fn(*args, **kwargs)
+    if result:
+        with _latency_lock:
+            _latencies[provider].append(time.monotonic() - started)
+    return result
+
+
+def _p95(provider):
+    with _latency_lock:
+        samples = sorted(_latencies[provider])
+    if len(samples) < 20:
+        return None
+    return samples[int(len(samples) * 0.95) - 1]
+
+
+def _hedge_delay():
+    p95 = _p95('serper')
+    if p95 is None:
+        return SEARCH_HEDGE_DELAY
+    return min(SEARCH_HEDGE_MAX, max(SEARCH_HEDGE_MIN, p95))
+
+
+def _count(field):
+    with _latency_lock:
+        _search_stats[field] += 1
+
+
+def _hedged_search(query, recency, timeout):
+    """
+    Serper + Tavily hedge'li. İlk iyi sonucu döner; iki sağlayıcı da gerçekten
+    boş döndüyse '' (negatif cache'lenir). Sağlayıcılardan biri hata verdiyse ya
+    da süre dolduysa None — cache'lenmez, varsa bayat sonuç korunur.
+    """
+    deadline = time.monotonic() + timeout
+    _count('searches')
+
+    serper = _search_pool.submit(_timed, 'serper', serper_search, query, recency=recency)
+    done, _ = wait([serper], timeout=min(_hedge_delay(), timeout))
+    if serper in done and serper.exception() is None and serper.result():
+        _count('serper_wins')
+        return serper.result()
+
+    _count('hedged')
+    tavily  = _search_pool.submit(_timed, 'tavily', tavily_search, query)
+    pending = {serper, tavily} - done
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None and future.result():
+                for loser in pending:
+                    loser.cancel()
+                _count('serper_wins' if future is serper else 'tavily_wins')
+                return future.result()
+
+    if pending:
+        print(f"⚠️ Web search {timeout:.1f}s içinde sonuçlanmadı: {query[:60]}", flush=True)
+        for future in pending:
+            future.cancel()
+        return None
+    # Kesinti boş sonuç sayılmaz — negatif cache iyi bir bayat sonucun yerine geçmesin
+    if any(future.exception() is not None or future.result() is None for future in (serper, tavily)):
+        _count('failed')
+        return None
+    _count('empty')
+    return ''
+
+
+# ── Sonuç cache'i ─────────────────────────────────────────────────────────────
+
+SEARCH_STOPWORDS = {
+    'acaba', 'ama', 'bana', 'ben', 'bi', 'bir', 'biraz', 'bu', 'da', 'de', 'daha',
+    'icin', 'ile', 'ki', 'lutfen', 'mi', 'mu', 'musun', 'misin', 'muydu', 'miydi',
+    'soyle', 'soyler', 'su', 've', 'veya', 'ya', 'yani',
+}
+
+
+def normalize_query(query):
+    """
+    Cache anahtarı için: küçük harf, Türkçe karakter katlama, noktalama ve
+    dolgu kelimeleri atılır; kelime sırası korunur — "Dolar kaç TL?" ile
+    "dolar kac tl" aynı anahtara düşer. Harf/rakam içermeyen sorgu (emoji vb.)
+    katlanmış hâliyle anahtar olur.
+    """
+    folded = fold(query)
+    words  = re.findall(r'[^\W_]+', folded)   # Unicode harf/rakam — Kiril, CJK dahil
+    if not words:
+        return ' '.join(folded.split())
+    kept = [w for w in dict.fromkeys(words) if w not in SEARCH_STOPWORDS]
+    return ' '.join(kept or words)
+
+
+def _result_ttl(recency):
+    ttl = SEARCH_CACHE_TTL.get(recency, SEARCH_CACHE_TTL[None])
+    return lambda result: ttl if result else SEARCH_NEGATIVE_TTL
+
+
+def _result_stale(recency):
+    # Negatif sonuç bayat sunulmaz; dolu sonuç TTL'inin SEARCH_STALE_RATIO'su kadar
+    # ('h' sonucu en fazla 1.25 saat eski olur)
+    stale = int(SEARCH_CACHE_TTL.get(recency, SEARCH_CACHE_TTL[None]) * SEARCH_STALE_RATIO)
+    return lambda result: stale if result else 0
+
+
+def web_search(query, recency=None, timeout=SEARCH_TIMEOUT):
+    """Normalize edilmiş sorgu + recency ile cache'li, hedge'li arama; sonuç yoksa None."""
+    key = f"{recency or '-'}:{normalize_query(query)}"
+    result = cached(
+        'search', key,
+        lambda: _hedged_search(query, recency, timeout),
+        ttl=_result_ttl(recency),
+        stale=_result_stale(recency),
+        wait=timeout,
+    )
+    return result or None
+
+
+def get_search_stats():
+    with _latency_lock:
+        stats = dict(_search_stats)
+    for provider in ('serper', 'tavily'):
+        p95 = _p95(provider)
+        stats[f'{provider}_p95_ms'] = round(p95 * 1000) if p95 else None
+    stats['hedge_delay_ms'] = round(_hedge_delay() * 1000)
+    return stats
@@ -0,0 +1,256 @@
+# services/teams.py
+"""
+Takım dizini — anahtar kelime → API-Football takım id/adı.
+
+Dizin team_directory tablosunda tutulur, worker açılırken belleğe yüklenir ve
+arka plan thread'i eksik/eskimiş kayıtları /teams?search= ile çözüp tabloya
+yazar. Sohbet yolundaki çözümleme tamamen bellekte yapılır: Türkçe karakter
+katlamalı (fenerbahçe = fenerbahce) birebir eşleşme. Dizinde olmayan kelime arka
+planda çözülmek üzere kuyruğa alınır. Mesajdaki yazım hataları tespit
+aşamasında fuzzy_team_keywords ile bilinen anahtar kelimelere eşlenir.
+"""
+import re
+import time
+import difflib
+import threading
+from functools import lru_cache
+from psycopg2.extras import execute_values
+from config import (
+    API_FOOTBALL_KEY, TR_TEAM_KEYWORDS, EURO_TEAM_KEYWORDS,
+    TEAM_DIRECTORY_REFRESH, TEAM_DIRECTORY_MAX_AGE_DAYS, TEAM_FUZZY_MIN_LEN, TEAM_FUZZY_CUTOFF,
+)
+from database import get_db, release_db
+from services.text import fold
+from services.http_client import http_get
+
+_lock      = threading.Lock()
+_teams     = {}      # folded keyword -> (team_id, team_name)
+_pending   = set()   # arka planda çözülecek (folded) kelimeler
+_failed    = {}      # folded keyword -> son başarısız deneme (monotonic)
+_wakeup    = threading.Event()
+_thread    = None
+
+RETRY_FAILED_AFTER = 3600
+
+_KEYWORDS = {}   # folded keyword -> config'teki yazımı (fenerbahce -> fenerbahçe)
+for _kw in TR_TEAM_KEYWORDS + EURO_TEAM_KEYWORDS:
+    _KEYWORDS.setdefault(fold(_kw), _kw)
+_KEYWORDS_BY_INITIAL = {}
+for _key in _KEYWORDS:
+    _KEYWORDS_BY_INITIAL.setdefault(_key[0], []).append(_key)
+
+
+# ── Sohbet yolu (ağ çağrısı yok) ──────────────────────────────────────────────
+
+def resolve_team(keyword):
+    """Anahtar kelimeyi (team_id, team_name)'e çevirir; bilinmiyorsa (None, None)."""
+    key = fold(keyword)
+    with _lock:
+        hit = _teams.get(key)
+    if hit is not None:
+        return hit
+
+    _queue_resolve(key)
+    return None, None
+
+
+def fuzzy_team_keywords(text, exclude=()):
+    """
+    Mesajdaki yazım hatalı takım adlarını (galatasray, real madird) bilinen
+    anahtar kelimelere eşler; kelimeler ve ikili kelime grupları denenir.
+    exclude: birebir eşleşmiş anahtar kelimeler — tekrar döndürülmez.
+    """
+    words      = re.findall(r'[^\W\d_]+', fold(text))
+    candidates = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    seen       = [fold(kw) for kw in exclude]
+    found      = []
+    for candidate in candidates:
+        key = _closest_keyword(candidate)
+        # Aynı kulübün başka yazımı (fatih karagümrük / karagumruk) ikinci takım sayılmaz
+        if key and not any(same_team(key, other) for other in seen):
+            seen.append(key)
+            found.append(_KEYWORDS[key])
+    return found
+
+
+def same_team(keyword1, keyword2):
+    """İki anahtar kelime aynı kulübü mü gösteriyor? (katlanmış kapsama ya da aynı team_id)"""
+    a, b = fold(keyword1), fold(keyword2)
+    if a in b or b in a:
+        return True
+    with _lock:
+        hit1, hit2 = _teams.get(a), _teams.get(b)
+    return hit1 is not None and hit2 is not None and hit1[0] == hit2[0]
+
+
+@lru_cache(maxsize=4096)
+def _closest_keyword(candidate):
+    # Yazım hatası ilk harfte nadirdir — sadece aynı harfle başlayanlara bakılır
+    if len(candidate) < TEAM_FUZZY_MIN_LEN or candidate in _KEYWORDS:
+        return None
+    close = difflib.get_close_matches(
+        candidate, _KEYWORDS_BY_INITIAL.get(candidate[0], ()), n=1, cutoff=TEAM_FUZZY_CUTOFF,
+    )
+    return close[0] if close else None
+
+
+def _queue_resolve(key):
+    with _lock:
+        failed_at = _failed.get(key)
+        if failed_at and time.monotonic() - failed_at < RETRY_FAILED_AFTER:
+            return
+        _pending.add(key)
+    _wakeup.set()
+
+
+# ── DB ────────────────────────────────────────────────────────────────────────
+
+def load_team_directory():
+    """team_directory tablosunu belleğe yükler; eskimiş kelimeleri döndürür."""
+    conn = None
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT keyword, team_id, team_name,
+                   updated_at < NOW() - make_interval(days => %s) AS expired
+            FROM team_directory
+        """, (TEAM_DIRECTORY_MAX_AGE_DAYS,))
+        rows = cursor.fetchall()
+        cursor.close()
+    except Exception as e:
+        print(f"⚠️ Team directory load error: {e}", flush=True)
+        return set()
+    finally:
+        release_db(conn)
+
+    with _lock:
+        for row in rows:
+            _teams[row['keyword']] = (row['team_id'], row['team_name'])
+    print(f"✅ Team directory: {len(rows)} takım yüklendi", flush=True)
+    return {row['keyword'] for row in rows if row['expired']}
+
+
+def _store(resolved):
+    conn = None
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        execute_values(cursor, """
+            INSERT INTO team_directory (keyword, team_id, team_name)
+            VALUES %s
+            ON CONFLICT (keyword) DO UPDATE SET
+                team_id    = EXCLUDED.team_id,
+                team_name  = EXCLUDED.team_name,
+                updated_at = NOW()
+        """, [(k, tid, name) for k, (tid, name) in resolved.items()])
+        conn.commit()
+        cursor.close()
+    except Exception as e:
+        print(f"⚠️ Team directory save error: {e}", flush=True)
+        if conn:
+            try: conn.rollback()
+            except: pass
+    finally:
+        release_db(conn)
+
+
+# ── API-Football ──────────────────────────────────────────────────────────────
+
+def _search_team(keyword):
+    resp = http_get(
+        'https://v3.football.api-sports.io/teams',
+        headers={
+            'x-rapidapi-host': 'v3.football.api-sports.io',
+            'x-rapidapi-key': API_FOOTBALL_KEY,
+        },
+        params={'search': keyword},
+        timeout=5,
+        breaker='api_football',
+    )
+    if resp.status_code != 200:
+        return None
+    teams = resp.json().get('response', [])
+    if not teams:
+        return None
+    return teams[0]['team']['id'], teams[0]['team']['name']
+
+
+def _resolve_keywords(keys):
+    """Kelimeleri API'den çözer, belleğe ve tabloya yazar."""
+    # Aynı katlanmış biçime düşen yazımlar (fenerbahçe/fenerbahce) tek istekle çözülür
+    spellings = {}
+    for kw in TR_TEAM_KEYWORDS + EURO_TEAM_KEYWORDS:
+        spellings.setdefault(fold(kw), kw)
+
+    resolved = {}
+    for key in keys:
+        try:
+            hit = _search_team(spellings.get(key, key))
+            if hit is None and spellings.get(key, key) != key:
+                hit = _search_team(key)
+        except Exception as e:
+            print(f"⚠️ Team search error ({key}): {e}", flush=True)
+            hit = None
+
+        with _lock:
+            if hit is None:
+                _failed[key] = time.monotonic()
+            else:
+                _failed.pop(key, None)
+                _teams[key] = hit
+        if hit is not None:
+            resolved[key] = hit
+
+    if resolved:
+        _store(resolved)
+        print(f"✅ Team directory: {len(resolved)} takım çözüldü", flush=True)
+
+
+def _sync():
+    expired = load_team_directory()
+    with _lock:
+        known = set(_teams)
+    wanted  = {fold(kw) for kw in TR_TEAM_KEYWORDS + EURO_TEAM_KEYWORDS}
+    missing = (wanted - known) | expired
+    with _lock:
+        now = time.monotonic()
+        missing = {
+            k for k in missing
+            if k not in _failed or now - _failed[k] >= RETRY_FAILED_AFTER
+        }
+    if missing and API_FOOTBALL_KEY:
+        _resolve_keywords(missing)
+
+
+def _run():
+    next_sync = 0.0
+    while True:
+        if time.monotonic() >= next_sync:
+            try:
+                _sync()
+            except Exception as e:
+                print(f"⚠️ Team directory sync error: {e}", flush=True)
+            next_sync = time.monotonic() + TEAM_DIRECTORY_REFRESH
+
+        _wakeup.wait(timeout=max(0.0, next_sync - time.monotonic()))
+        _wakeup.clear()
+        with _lock:
+            keys = set(_pending)
+            _pending.clear()
+        if keys and API_FOOTBALL_KEY:
+            try:
+                _resolve_keywords(keys)
+            except Exception as e:
+                print(f"⚠️ Team resolve error: {e}", flush=True)
+
+
+def start_team_directory():
+    """Dizini yükler ve arka plan senkronizasyon thread'ini başlatır (worker başına bir kez)."""
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_run, name='team-directory', daemon=True)
+    load_team_directory()
+    _thread.start()
@@ -0,0 +1,11 @@
+# services/text.py
+import unicodedata
+
+_TR_FOLD = str.maketrans('çğıİöşüâîû', 'cgiiosuaiu')
+
+
+def fold(text):
+    """Küçük harf + Türkçe/aksanlı karakterleri ASCII'ye indirger."""
+    text = text.lower().translate(_TR_FOLD)
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).strip()
@@ -0,0 +1,279 @@
+# services/writer.py
+"""
+Write-behind kuyruğu — chat yolundaki kayıtlar (mesaj, duygu, analytics, usage,
+last_login_at)
+istek sırasında sadece kuyruğa alınır; arka plan thread'i bunları
+WRITE_BEHIND_INTERVAL_MS'de bir ya da WRITE_BEHIND_BATCH_ROWS satırda bir
+çok satırlı INSERT'lerle tek transaction'da yazar. Worker kapanırken
+(SIGTERM → sys.exit → atexit) kuyrukta kalanlar boşaltılır.
+"""
+import json
+import atexit
+import threading
+import psycopg2
+from psycopg2.pool import PoolError
+from datetime import datetime, timezone
+from psycopg2.extras import execute_values
+from config import WRITE_BEHIND_INTERVAL_MS, WRITE_BEHIND_BATCH_ROWS, WRITE_BEHIND_MAX_ROWS
+from database import get_db, release_db
+
+# Batch'i kuyruğa geri döndüren hatalar — havuz tükenmesi (PoolError) dahil
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, PoolError)
+
+_lock        = threading.Lock()
+_flush_lock  = threading.Lock()
+_wakeup      = threading.Event()
+_stopping    = threading.Event()
+_thread      = None
+
+_messages = []   # (user_id, role, content, token_count, emotion, created_at)
+_emotions = []   # (device_id, emotion, intensity, context, created_at)
+_events   = []   # (event_name, user_id, properties_json, created_at)
+_usage    = {}   # (user_id, date) -> [message_count, token_count, cost]
+_logins   = set()  # last_login_at güncellenecek user_id'ler
+
+
+def _now():
+    # tz-aware → DB'de NOW() ile aynı şekilde yorumlanır; batch içindeki sıra korunur
+    return datetime.now(timezone.utc)
+
+
+def _pending_rows():
+    return len(_messages) + len(_emotions) + len(_events) + len(_usage) + len(_logins)
+
+
+def _after_enqueue():
+    _ensure_started()
+    pending = _pending_rows()
+    if pending >= WRITE_BEHIND_MAX_ROWS:
+        # Backpressure — kuyruk taşıyorsa çağıran thread kendisi yazar
+        flush()
+    elif pending >= WRITE_BEHIND_BATCH_ROWS:
+        _wakeup.set()
+
+
+# ── Kuyruğa alma ──────────────────────────────────────────────────────────────
+
+def enqueue_message(user_id, role, content, token_count=0, emotion=None):
+    with _lock:
+        _messages.append((user_id, role, content, token_count, emotion, _now()))
+    _after_enqueue()
+
+
+def enqueue_emotion(device_id, emotion, intensity=0.5, context=None):
+    if not emotion or emotion == 'neutral':
+        return
+    with _lock:
+        _emotions.append((device_id, emotion, intensity, context, _now()))
+    _after_enqueue()
+
+
+def enqueue_event(event_name, user_id=None, properties=None):
+    with _lock:
+        _events.append((event_name, user_id, json.dumps(properties or {}), _now()))
+    _after_enqueue()
+
+
+def enqueue_usage(user_id, token_count=0, model='gpt-4o-mini'):
+    from services.learning import get_turkey_time
+    from services.ai_service import calculate_cost
+    key = (user_id, get_turkey_time().date())
+    with _lock:
+        counters = _usage.setdefault(key, [0, 0, 0.0])
+        counters[0] += 1
+        counters[1] += token_count
+        counters[2] += calculate_cost(token_count, model)
+    _after_enqueue()
+
+
+def enqueue_login(user_id):
+    with _lock:
+        _logins.add(user_id)
+    _after_enqueue()
+
+
+# ── Yazma ─────────────────────────────────────────────────────────────────────
+
+def _write_messages(cursor, rows):
+    execute_values(cursor, """
+        INSERT INTO messages (user_id, role, content, token_count, emotion, created_at)
+        VALUES %s
+    """, rows)
+
+
+def _write_emotions(cursor, rows):
+    execute_values(cursor, """
+        INSERT INTO user_emotion_history (device_id, emotion, intensity, context, created_at)
+        VALUES %s
+    """, rows)
+
+
+def _write_events(cursor, rows):
+    execute_values(cursor, """
+        INSERT INTO analytics_events (event_name, user_id, properties, created_at)
+        VALUES %s
+        ON CONFLICT DO NOTHING
+    """, rows)
+
+
+def _write_usage(cursor, rows):
+    execute_values(cursor, """
+        INSERT INTO usage_stats (user_id, date, message_count, token_count, cost)
+        VALUES %s
+        ON CONFLICT (user_id, date)
+        DO UPDATE SET
+            message_count = usage_stats.message_count + EXCLUDED.message_count,
+            token_count   = usage_stats.token_count + EXCLUDED.token_count,
+            cost          = usage_stats.cost + EXCLUDED.cost,
+            updated_at    = NOW()
+    """, rows)
+
+
+def _write_logins(cursor, rows):
+    cursor.execute(
+        "UPDATE users SET last_login_at = NOW() WHERE id IN %s",
+        (tuple(rows),)
+    )
+
+
+def _batch_parts(messages, emotions, events, usage, logins):
+    """[(tablo, yazıcı, satırlar), ...] — boş tablolar atlanır."""
+    parts = [
+        ('messages',             _write_messages, messages),
+        ('user_emotion_history', _write_emotions, emotions),
+        ('analytics_events',     _write_events,   events),
+        ('usage_stats',          _write_usage,
+         [(uid, day, c[0], c[1], c[2]) for (uid, day), c in usage.items()]),
+        ('users.last_login_at',  _write_logins,   list(logins)),
+    ]
+    return [part for part in parts if part[2]]
+
+
+def _try_write(cursor, write, rows):
+    """Savepoint içinde yazar; veri hatasında geri alıp False döner."""
+    cursor.execute("SAVEPOINT write_behind")
+    try:
+        write(cursor, rows)
+    except CONNECTION_ERRORS:
+        raise
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT write_behind")
+        return e
+    cursor.execute("RELEASE SAVEPOINT write_behind")
+    return None
+
+
+def _write_isolated(cursor, parts):
+    """
+    Toplu yazım veri hatası verince: önce her tablo ayrı, o da olmazsa o
+    tablonun satırları tek tek denenir — sadece bozuk satırlar atılır.
+    """
+    written = 0
+    for table, write, rows in parts:
+        if _try_write(cursor, write, rows) is None:
+            written += len(rows)
+            continue
+        for row in rows:
+            error = _try_write(cursor, write, [row])
+            if error is None:
+                written += 1
+            else:
+                print(f"⚠️ write-behind: {table} satırı atıldı: {error}", flush=True)
+    return written
+
+
+def flush():
+    """Kuyruktaki her şeyi tek transaction'da yazar. Yazılan satır sayısını döner."""
+    global _messages, _emotions, _events, _usage, _logins
+    with _flush_lock:
+        with _lock:
+            messages, emotions, events, usage, logins = _messages, _emotions, _events, _usage, _logins
+            _messages, _emotions, _events, _usage, _logins = [], [], [], {}, set()
+        total = len(messages) + len(emotions) + len(events) + len(usage) + len(logins)
+        if not total:
+            return 0
+
+        parts  = _batch_parts(messages, emotions, events, usage, logins)
+        conn   = None
+        broken = False
+        try:
+            conn = get_db()
+            cursor = conn.cursor()
+            try:
+                for _, write, rows in parts:
+                    write(cursor, rows)
+                written = total
+            except CONNECTION_ERRORS:
+                raise
+            except Exception as e:
+                # Bozuk bir satır (örn. NUL karakterli mesaj) bütün batch'i düşürmesin
+                print(f"⚠️ write-behind batch error ({total} satır), ayrıştırılıyor: {e}", flush=True)
+                conn.rollback()
+                written = _write_isolated(cursor, parts)
+            conn.commit()
+            cursor.close()
+            return written
+        except Exception as e:
+            print(f"❌ write-behind flush error ({total} satır): {e}", flush=True)
+            broken = isinstance(e, CONNECTION_ERRORS)
+            if conn and not broken:
+                try: conn.rollback()
+                except Exception: pass
+            # Bağlantı alınamadıysa ya da koptuysa batch kuyruğa geri döner;
+            # diğer hatalar yukarıda satır satır ayrıştırıldı
+            if broken or conn is None:
+                _requeue(messages, emotions, events, usage, logins)
+            return 0
+        finally:
+            # Kopmuş bağlantı havuza geri konmaz, kapatılır
+            release_db(conn, close=broken)
+
+
+def _requeue(messages, emotions, events, usage, logins):
+    global _messages, _emotions, _events
+    with _lock:
+        if _pending_rows() + len(messages) + len(emotions) + len(events) > WRITE_BEHIND_MAX_ROWS:
+            print("⚠️ write-behind kuyruğu dolu, başarısız batch atıldı", flush=True)
+            return
+        _messages = messages + _messages
+        _emotions = emotions + _emotions
+        _events   = events + _events
+        for key, (count, tokens, cost) in usage.items():
+            counters = _usage.setdefault(key, [0, 0, 0.0])
+            counters[0] += count
+            counters[1] += tokens
+            counters[2] += cost
+        _logins.update(logins)
+
+
+# ── Arka plan thread'i ────────────────────────────────────────────────────────
+
+def _run():
+    interval = WRITE_BEHIND_INTERVAL_MS / 1000
+    while not _stopping.is_set():
+        _wakeup.wait(interval)
+        _wakeup.clear()
+        flush()
+
+
+def _ensure_started():
+    global _thread
+    if _thread is not None:
+        return
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_run, name='write-behind', daemon=True)
+        _thread.start()
+        atexit.register(shutdown)
+
+
+def shutdown(timeout=5.0):
+    """Worker kapanışı — thread'i durdurur ve kalan satırları yazar."""
+    _stopping.set()
+    _wakeup.set()
+    if _thread is not None:
+        _thread.join(timeout)
+    written = flush()
+    if written:
+        print(f"✅ write-behind kapanışta {written} satır yazdı", flush=True)